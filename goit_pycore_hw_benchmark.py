@@ -0,0 +1,354 @@
+"""
+Бенчмарки
+
+Генерує великі відтворювані вхідні дані (файли зарплат, файли котів, дерева директорій і скрипти команд бота)
+та вимірює час виконання і пік виділеної пам'яті total_salary, get_cats_info, print_dir_tree
+і диспетчера команд бота. Результати записуються у JSON, щоб порівнювати коміти між собою.
+
+Приклад використання:
+
+python goit_pycore_hw_benchmark.py --scale 1.0 --output bench.json
+python goit_pycore_hw_benchmark.py --baseline bench.json
+"""
+from contextlib import redirect_stdout
+from pathlib import Path
+from typing import Callable, List, NamedTuple, Optional
+import argparse
+import json
+import os
+import platform
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+
+from goit_pycore_hw_cli_bot import Dispatcher, open_contacts, parse_input
+from goit_pycore_hw_dirs_tree import print_dir_tree
+from goit_pycore_hw_file import get_cats_info
+from goit_pycore_hw_metrics import add_metrics_argument, configure
+from goit_pycore_hw_salary import total_salary
+
+# Rows of the generated files, commands of the bot script and directories of the tree at scale 1.0
+SALARY_ROWS = 1_000_000
+CATS_ROWS = 1_000_000
+BOT_COMMANDS = 200_000
+TREE_DIRS = 10_000
+# Version of the JSON results, bumped when the fields change
+RESULTS_VERSION = 1
+# A benchmark slower than the baseline by this ratio is reported as a regression
+REGRESSION_RATIO = 1.2
+
+NAMES = ("Alex", "Nikita", "Sitarama", "Tayson", "Vika", "Barsik", "Simon", "Tessi", "Olena", "Ivan")
+
+
+class BenchmarkResult(NamedTuple):
+    """
+    The measurements of one benchmark.
+
+    Fields:
+    - name (str): The name of the benchmark.
+    - size (int): The number of rows, commands or entries processed.
+    - seconds (float): The wall time of the run without tracing.
+    - peak_bytes (int): The peak of memory allocated by Python during a traced run.
+    """
+    name: str
+    size: int
+    seconds: float
+    peak_bytes: int
+
+    def __str__(self) -> str:
+        return f"{self.name:<16} {self.size:>10} {self.seconds:8.2f} s {self.peak_bytes / (1 << 20):10.1f} MiB peak"
+
+
+def generate_salary_file(path: str, rows: int, seed: int = 0, corruption: float = 0.0):
+    """
+    Writes a salary file of "name,salary" lines.
+
+    Parameters:
+    - path (str): The file to write.
+    - rows (int): The number of lines.
+    - seed (int): The seed of the random generator, the same seed writes the same file.
+    - corruption (float): The share of lines without a salary, which total_salary counts as corrupted.
+    """
+    generator = random.Random(seed)
+    with open(path, 'w', encoding='utf-8') as file:
+        for i in range(rows):
+            name = f"{generator.choice(NAMES)} {i}"
+            if generator.random() < corruption:
+                file.write(f"{name}\n")
+            else:
+                file.write(f"{name},{generator.randrange(500, 10000)}\n")
+
+def generate_cats_file(path: str, rows: int, seed: int = 0, corruption: float = 0.0):
+    """
+    Writes a cats file of "id,name,age" lines with valid ObjectId identifiers.
+
+    Parameters:
+    - path (str): The file to write.
+    - rows (int): The number of lines.
+    - seed (int): The seed of the random generator, the same seed writes the same file.
+    - corruption (float): The share of lines with a broken id, a missing field or an invalid age.
+    """
+    generator = random.Random(seed)
+    with open(path, 'w', encoding='utf-8') as file:
+        for i in range(rows):
+            # An ObjectId is a 4 bytes timestamp, 5 random bytes and a 3 bytes counter
+            cat_id = f"{1_600_000_000 + i:08x}{generator.getrandbits(40):010x}{i & 0xFFFFFF:06x}"
+            name = f"{generator.choice(NAMES)}{i}"
+            age = str(generator.randrange(1, 25))
+            if generator.random() < corruption:
+                kind = generator.randrange(3)
+                if kind == 0:
+                    cat_id = cat_id[:-1] + "z"
+                elif kind == 1:
+                    file.write(f"{cat_id},{name}\n")
+                    continue
+                else:
+                    age = "old"
+            file.write(f"{cat_id},{name},{age}\n")
+
+def generate_tree(root: Path, directories: int, depth: int = 20, files_per_dir: int = 5, seed: int = 0) -> int:
+    """
+    Creates a tree of empty files that is both wide and deep: the root holds chains of nested
+    directories, each chain going depth levels down.
+
+    Parameters:
+    - root (Path): The directory to create the tree in.
+    - directories (int): The total number of directories.
+    - depth (int): The length of the chains of nested directories.
+    - files_per_dir (int): The largest number of files in a directory, the actual number is random.
+    - seed (int): The seed of the random generator, the same seed creates the same tree.
+
+    Returns:
+    - int: The number of directories and files created.
+    """
+    generator = random.Random(seed)
+    entries = 0
+    for chain in range(max(1, directories // depth)):
+        path = root
+        for level in range(depth):
+            path = path / f"{generator.choice(NAMES).lower()}_{chain}_{level}"
+            path.mkdir(parents=True)
+            entries += 1
+            for i in range(generator.randrange(files_per_dir + 1)):
+                (path / f"file_{i}.txt").touch()
+                entries += 1
+    return entries
+
+def generate_bot_script(commands: int, seed: int = 0, contacts: int = 1000) -> List[str]:
+    """
+    Returns the lines of a bot session mixing the commands of the bot.
+
+    Parameters:
+    - commands (int): The number of lines.
+    - seed (int): The seed of the random generator, the same seed returns the same script.
+    - contacts (int): The number of distinct contact names used.
+    """
+    generator = random.Random(seed)
+    lines = []
+    for _ in range(commands):
+        name = f"{generator.choice(NAMES)}{generator.randrange(contacts)}"
+        phone = f"{generator.randrange(10 ** 9, 10 ** 10)}"
+        roll = generator.random()
+        if roll < 0.4:
+            lines.append(f"add {name} {phone}")
+        elif roll < 0.6:
+            lines.append(f"change {name} {phone}")
+        elif roll < 0.85:
+            lines.append(f"phone {name}")
+        elif roll < 0.9:
+            lines.append(f"find {name[:3]}")
+        elif roll < 0.95:
+            lines.append("all 1")
+        else:
+            lines.append("hello")
+    return lines
+
+def dispatch_script(lines: List[str]):
+    """
+    Runs the lines of a bot script with a dispatcher over in-memory contacts.
+    """
+    dispatcher = Dispatcher(open_contacts())
+    for line in lines:
+        command, *args = parse_input(line)
+        for _ in dispatcher.dispatch(command, tuple(args)):
+            pass
+
+def measure(name: str, size: int, function: Callable, *args) -> BenchmarkResult:
+    """
+    Runs the function once for the wall time and once under tracemalloc for the peak of memory,
+    writing its printed output to os.devnull.
+    """
+    with open(os.devnull, 'w', encoding='utf-8') as devnull, redirect_stdout(devnull):
+        started = time.perf_counter()
+        function(*args)
+        seconds = time.perf_counter() - started
+        tracemalloc.start()
+        try:
+            function(*args)
+            _, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+    return BenchmarkResult(name, size, seconds, peak)
+
+def run_benchmarks(scale: float = 1.0, seed: int = 0, corruption: float = 0.01,
+                   only: Optional[List[str]] = None) -> List[BenchmarkResult]:
+    """
+    Generates the data in a temporary directory and measures the four tools on it.
+
+    Parameters:
+    - scale (float): The multiplier of the default sizes of the data.
+    - seed (int): The seed of the generators.
+    - corruption (float): The share of corrupted lines of the salary and cats files.
+    - only (Optional[List[str]]): The names of the benchmarks to run, all by default.
+
+    Returns:
+    - List[BenchmarkResult]: The measurements in the order of the runs.
+    """
+    results = []
+
+    def wanted(name: str) -> bool:
+        return only is None or name in only
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        if wanted("total_salary"):
+            path = os.path.join(temp_dir, "salary.txt")
+            rows = max(1, int(SALARY_ROWS * scale))
+            generate_salary_file(path, rows, seed, corruption)
+            results.append(measure("total_salary", rows, total_salary, path))
+        if wanted("get_cats_info"):
+            path = os.path.join(temp_dir, "cats.txt")
+            rows = max(1, int(CATS_ROWS * scale))
+            generate_cats_file(path, rows, seed, corruption)
+            results.append(measure("get_cats_info", rows, get_cats_info, path))
+        if wanted("print_dir_tree"):
+            root = Path(temp_dir) / "tree"
+            entries = generate_tree(root, max(1, int(TREE_DIRS * scale)), seed=seed)
+            results.append(measure("print_dir_tree", entries, print_dir_tree, root))
+        if wanted("bot_dispatch"):
+            lines = generate_bot_script(max(1, int(BOT_COMMANDS * scale)), seed)
+            results.append(measure("bot_dispatch", len(lines), dispatch_script, lines))
+    return results
+
+def save_results(path: str, results: List[BenchmarkResult], **metadata):
+    """
+    Writes the results and the metadata of the run to a JSON file.
+    """
+    document = {
+        "version": RESULTS_VERSION,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        **metadata,
+        "results": [result._asdict() for result in results],
+    }
+    with open(path, 'w', encoding='utf-8') as file:
+        json.dump(document, file, indent=2)
+        file.write("\n")
+
+def load_results(path: str) -> List[BenchmarkResult]:
+    """
+    Reads the results written by save_results, an empty list if the file is missing or of another version.
+    """
+    try:
+        with open(path, 'r', encoding='utf-8') as file:
+            document = json.load(file)
+    except FileNotFoundError:
+        print(f"File '{path}' not found")
+        return []
+    except ValueError:
+        print(f"File '{path}' is corrupted")
+        return []
+    if document.get("version") != RESULTS_VERSION:
+        print(f"File '{path}' has results of another version")
+        return []
+    return [BenchmarkResult(**result) for result in document["results"]]
+
+def compare_results(results: List[BenchmarkResult], baseline: List[BenchmarkResult],
+                    ratio: float = REGRESSION_RATIO) -> List[str]:
+    """
+    Prints the time and memory ratios of the results to the baseline and returns the names
+    of the benchmarks slower or larger than the baseline by more than the ratio.
+    Benchmarks run on another size are not compared.
+    """
+    previous = {result.name: result for result in baseline}
+    regressions = []
+    for result in results:
+        old = previous.get(result.name)
+        if old is None or old.size != result.size:
+            print(f"{result.name:<16} no baseline")
+            continue
+        time_ratio = result.seconds / old.seconds if old.seconds else 1.0
+        memory_ratio = result.peak_bytes / old.peak_bytes if old.peak_bytes else 1.0
+        regressed = time_ratio > ratio or memory_ratio > ratio
+        if regressed:
+            regressions.append(result.name)
+        print(f"{result.name:<16} time x{time_ratio:.2f} memory x{memory_ratio:.2f}{'  REGRESSION' if regressed else ''}")
+    return regressions
+
+def main(argv: Optional[List[str]] = None):
+    """
+    Runs the benchmarks from the command line, exits with status 1 if a regression is found.
+
+    Parameters:
+    - argv (Optional[List[str]]): The command line arguments, sys.argv by default.
+    """
+    parser = argparse.ArgumentParser(description="Benchmarks the homework tools on generated data")
+    parser.add_argument("--scale", type=float, default=1.0, help="Multiplier of the default data sizes")
+    parser.add_argument("--seed", type=int, default=0, help="Seed of the data generators")
+    parser.add_argument("--corruption", type=float, default=0.01, help="Share of corrupted lines in the data files")
+    parser.add_argument("--only", nargs="+", help="Names of the benchmarks to run")
+    parser.add_argument("--output", help="JSON file to write the results to")
+    parser.add_argument("--baseline", help="JSON file of earlier results to compare with")
+    parser.add_argument("--ratio", type=float, default=REGRESSION_RATIO,
+                        help="Slowdown or memory growth reported as a regression")
+    add_metrics_argument(parser)
+    args = parser.parse_args(argv)
+    configure(args.metrics)
+    results = run_benchmarks(args.scale, args.seed, args.corruption, args.only)
+    for result in results:
+        print(result)
+    if args.output:
+        save_results(args.output, results, scale=args.scale, seed=args.seed, corruption=args.corruption)
+    if args.baseline and compare_results(results, load_results(args.baseline), args.ratio):
+        sys.exit(1)
+
+def test_generators():
+    with tempfile.TemporaryDirectory() as temp_dir:
+        salary = os.path.join(temp_dir, "salary.txt")
+        generate_salary_file(salary, 1000, seed=1, corruption=0.1)
+        with open(salary, encoding='utf-8') as file:
+            lines = file.read().splitlines()
+        assert len(lines) == 1000
+        assert 50 < sum(',' not in line for line in lines) < 150, "About 10% of the lines are corrupted"
+        copy = os.path.join(temp_dir, "copy.txt")
+        generate_salary_file(copy, 1000, seed=1, corruption=0.1)
+        assert Path(copy).read_bytes() == Path(salary).read_bytes(), "The same seed writes the same file"
+        cats = os.path.join(temp_dir, "cats.txt")
+        generate_cats_file(cats, 1000, seed=1)
+        with open(os.devnull, 'w', encoding='utf-8') as devnull, redirect_stdout(devnull):
+            assert len(get_cats_info(cats)) == 1000, "Every generated cat is valid"
+            generate_cats_file(cats, 1000, seed=1, corruption=0.2)
+            assert 700 < len(get_cats_info(cats)) < 900, "About 20% of the cats are rejected"
+        entries = generate_tree(Path(temp_dir) / "tree", 40, depth=10, files_per_dir=2)
+        walked = sum(len(directories) + len(files) for _, directories, files in os.walk(Path(temp_dir) / "tree"))
+        assert entries == walked and max(len(Path(path).parts) for path, _, _ in os.walk(temp_dir)) >= 10
+        script = generate_bot_script(100, seed=1)
+        assert script == generate_bot_script(100, seed=1) and len(script) == 100
+        results = run_benchmarks(scale=0.001, seed=1)
+        assert [result.name for result in results] == ["total_salary", "get_cats_info", "print_dir_tree", "bot_dispatch"]
+        output = os.path.join(temp_dir, "bench.json")
+        save_results(output, results, scale=0.001)
+        assert load_results(output) == results
+        assert compare_results(results, [result._replace(seconds=result.seconds / 2, peak_bytes=result.peak_bytes * 2)
+                                         for result in results], ratio=10.0) == []
+        slower = [result._replace(seconds=result.seconds * 3 + 1) for result in results]
+        assert compare_results(slower, results) == [result.name for result in results]
+    print("All test cases passed successfully.")
+
+# Uncomment the line below to run the test function
+# test_generators()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,253 @@
+"""
+Бінарний кеш
+
+Компактний бінарний файл поруч із вихідним CSV-файлом (sidecar), у якому зберігаються вже розібрані
+та перевірені дані у вигляді стовпців фіксованої ширини. Повторне завантаження відображає кеш у пам'ять
+(mmap) і зовсім не розбирає текст. Кеш вважається застарілим, якщо змінилися розмір або час зміни
+вихідного файлу, а для щойно змінених файлів також перевіряється хеш вмісту. Коли така перевірка
+вдається вже після того, як файл не може змінитися непомітно, час побудови в заголовку оновлюється,
+і наступні завантаження хеш не рахують.
+
+Формат файлу (little-endian):
+- заголовок HEADER: сигнатура, версія, вид даних, розмір, mtime і хеш вихідного файлу, час побудови,
+  кількість рядків, кількість допоміжних записів і прапорці
+- секції стовпців, кожна вирівняна на 8 байтів
+
+Використовується функціями total_salary_cached, load_cats_table_cached та індексом CatIndex.
+"""
+from typing import List, NamedTuple, Optional, Tuple
+import hashlib
+import mmap
+import os
+import pathlib
+import struct
+import tempfile
+import time
+
+from goit_pycore_hw_metrics import metrics
+
+CACHE_MAGIC = b"GOIT"
+CACHE_VERSION = 2
+CACHE_SUFFIX = ".bin"
+# Kinds of data of a cache file
+KIND_SALARY = 1
+KIND_CATS = 2
+KIND_CAT_INDEX = 3
+# magic, version, kind, source size, source mtime_ns, built_ns, source digest, rows, extra, flags
+HEADER = struct.Struct("<4sHHQqq16sQQQ")
+# Offset and format of the built_ns field of the header
+BUILT_OFFSET = struct.calcsize("<4sHHQq")
+BUILT_FIELD = struct.Struct("<q")
+# A source modified less than this before the cache was built may change again within
+# the same mtime, so its content hash is checked on every load
+CACHE_RACY_NS = 2_000_000_000
+# Size of the blocks hashed at once
+HASH_BLOCK_SIZE = 1 << 20
+
+
+class CacheHeader(NamedTuple):
+    """
+    The header of a cache file.
+
+    Attributes:
+    - kind (int): KIND_SALARY, KIND_CATS or KIND_CAT_INDEX.
+    - size (int): Size of the source file.
+    - mtime_ns (int): Modification time of the source file in nanoseconds.
+    - built_ns (int): Time the cache was built in nanoseconds.
+    - digest (bytes): BLAKE2b digest of the source file, 16 bytes.
+    - rows (int): Number of rows of the columns.
+    - extra (int): Number of entries of the auxiliary section, the rejected rows.
+    - flags (int): Flags of the kind of data.
+    """
+    kind: int
+    size: int
+    mtime_ns: int
+    built_ns: int
+    digest: bytes
+    rows: int
+    extra: int
+    flags: int
+
+
+def cache_path(path: str, suffix: str = CACHE_SUFFIX) -> pathlib.Path:
+    """
+    Returns the path of the binary cache file of the source file.
+    """
+    path = pathlib.Path(path)
+    return path.with_name(path.name + suffix)
+
+def new_digest():
+    """
+    Returns a new hash object of the digest stored in the header.
+    """
+    return hashlib.blake2b(digest_size=16)
+
+def source_digest(path: str) -> bytes:
+    """
+    Returns the digest of the content of the file.
+    """
+    digest = new_digest()
+    with open(path, 'rb') as file:
+        while block := file.read(HASH_BLOCK_SIZE):
+            digest.update(block)
+    return digest.digest()
+
+def write_cache(path: str, header: CacheHeader, sections: List[bytes], suffix: str = CACHE_SUFFIX):
+    """
+    Writes the header and the column sections to the cache file of the source, atomically.
+    The cache is not written if the source changed since the stamp of the header was taken.
+
+    Parameters:
+    - path (str): The path of the source file.
+    - header (CacheHeader): The header, with the stamp taken before the source was parsed.
+    - sections (List[bytes]): The columns, any objects supporting the buffer protocol.
+    - suffix (str): The suffix of the cache file name.
+    """
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return
+    if (stat.st_size, stat.st_mtime_ns) != (header.size, header.mtime_ns):
+        return
+    target = cache_path(path, suffix)
+    temp = target.with_name(target.name + ".tmp")
+    try:
+        with open(temp, 'wb') as file:
+            file.write(HEADER.pack(CACHE_MAGIC, CACHE_VERSION, *header))
+            for section in sections:
+                size = file.write(section)
+                file.write(b'\0' * (-size % 8))
+        os.replace(temp, target)
+    except OSError as error:
+        print(f"Cache '{target}' can not be written: {error.strerror}")
+        return
+    metrics.count("cache.builds")
+
+def open_cache(path: str, kind: int, verify: bool = False,
+               suffix: str = CACHE_SUFFIX) -> Optional[Tuple[CacheHeader, memoryview]]:
+    """
+    Memory-maps the cache file of the source if it is fresh.
+
+    Parameters:
+    - path (str): The path of the source file.
+    - kind (int): The expected kind of data.
+    - verify (bool): True to check the content hash of the source even if its mtime is old enough.
+    - suffix (str): The suffix of the cache file name.
+
+    Returns:
+    - Optional[Tuple[CacheHeader, memoryview]]: The header and the sections after it, None if the cache
+      is missing, of another version or kind, truncated or stale.
+    """
+    try:
+        stat = os.stat(path)
+        with open(cache_path(path, suffix), 'rb') as file:
+            cache_stat = os.fstat(file.fileno())
+            buffer = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+    except (OSError, ValueError):
+        # ValueError: an empty file can not be memory-mapped
+        return None
+    if len(buffer) < HEADER.size:
+        return None
+    magic, version, *fields = HEADER.unpack_from(buffer)
+    header = CacheHeader(*fields)
+    if (magic, version, header.kind) != (CACHE_MAGIC, CACHE_VERSION, kind):
+        return None
+    if (stat.st_size, stat.st_mtime_ns) != (header.size, header.mtime_ns):
+        metrics.count("cache.stale")
+        return None
+    racy = header.built_ns - header.mtime_ns < CACHE_RACY_NS
+    if verify or racy:
+        checked_ns = time.time_ns()
+        if source_digest(path) != header.digest:
+            metrics.count("cache.stale")
+            return None
+        # a change after the racy window would have changed the mtime, so the hash is final
+        if racy and checked_ns - header.mtime_ns >= CACHE_RACY_NS:
+            if _refresh_built(path, suffix, cache_stat, checked_ns):
+                header = header._replace(built_ns=checked_ns)
+    metrics.count("cache.hits")
+    return header, memoryview(buffer)[HEADER.size:]
+
+def _refresh_built(path: str, suffix: str, cache_stat: os.stat_result, built_ns: int) -> bool:
+    # rewrites the built_ns field of the cache file in place, unless it was replaced since it was opened
+    try:
+        with open(cache_path(path, suffix), 'r+b') as file:
+            stat = os.fstat(file.fileno())
+            if (stat.st_dev, stat.st_ino) != (cache_stat.st_dev, cache_stat.st_ino):
+                return False
+            os.pwrite(file.fileno(), BUILT_FIELD.pack(built_ns), BUILT_OFFSET)
+    except OSError:
+        return False
+    metrics.count("cache.refreshed")
+    return True
+
+def read_sections(body: memoryview, *sizes: int) -> Optional[List[memoryview]]:
+    """
+    Splits the body of a cache file into sections of the given sizes in bytes, each padded to 8 bytes.
+    Returns None if the body is too short.
+    """
+    sections = []
+    offset = 0
+    for size in sizes:
+        if offset + size > len(body):
+            return None
+        sections.append(body[offset:offset + size])
+        offset += size + (-size % 8)
+    return sections
+
+def stamp_header(path: str) -> Optional[Tuple[int, int, int]]:
+    """
+    Returns the size and the mtime in nanoseconds of the source and the current time, taken before
+    the source is parsed, None if the source does not exist.
+    """
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return stat.st_size, stat.st_mtime_ns, time.time_ns()
+
+
+def test_cache_file():
+    with tempfile.TemporaryDirectory() as temp_dir:
+        path = os.path.join(temp_dir, "source.txt")
+        with open(path, 'wb') as file:
+            file.write(b"source")
+        past = time.time_ns() - 10 * CACHE_RACY_NS
+        os.utime(path, ns=(past, past))
+        size, mtime_ns, built_ns = stamp_header(path)
+        header = CacheHeader(KIND_SALARY, size, mtime_ns, built_ns, source_digest(path), 2, 0, 0)
+        write_cache(path, header, [b"abc", b"12345678"])
+        assert cache_path(path).stat().st_size == HEADER.size + 16, "Sections are padded to 8 bytes"
+        cached, body = open_cache(path, KIND_SALARY)
+        assert cached == header
+        assert [bytes(section) for section in read_sections(body, 3, 8)] == [b"abc", b"12345678"]
+        assert read_sections(body, 3, 9) is None
+        assert open_cache(path, KIND_CATS) is None, "Another kind of data"
+        # The same size and mtime with another content is found by the hash only
+        with open(path, 'wb') as file:
+            file.write(b"SOURCE")
+        os.utime(path, ns=(past, past))
+        assert open_cache(path, KIND_SALARY) is not None
+        assert open_cache(path, KIND_SALARY, verify=True) is None
+        # A recently modified source is always verified
+        write_cache(path, header._replace(built_ns=mtime_ns + 1), [b"abc"])
+        assert open_cache(path, KIND_SALARY) is None
+        os.utime(path, ns=(past + 1, past + 1))
+        assert open_cache(path, KIND_SALARY, verify=False) is None, "Stale mtime"
+        # The cache is not written for a source changed after the stamp
+        os.unlink(cache_path(path))
+        write_cache(path, header, [b"abc"])
+        assert not cache_path(path).exists()
+        # A racy cache verified after the racy window is refreshed, so the next loads skip the hash
+        os.utime(path, ns=(past, past))
+        write_cache(path, header._replace(built_ns=past + 1, digest=source_digest(path)), [b"abc"])
+        cached, _ = open_cache(path, KIND_SALARY)
+        assert cached.built_ns - past >= CACHE_RACY_NS
+        with open(path, 'wb') as file:
+            file.write(b"source")
+        os.utime(path, ns=(past, past))
+        assert open_cache(path, KIND_SALARY)[0] == cached, "Header refreshed on disk, no hash"
+    print("All test cases passed successfully.")
+
+# Uncomment the line below to run the test function
+# test_cache_file()
@@ -12,9 +12,592 @@
 Логіка команд реалізована в окремих функціях і ці функції приймають на вхід один або декілька рядків та повертають рядок.
 Вся логіка взаємодії з користувачем реалізована у функції main, всі print та input відбуваються тільки там.
 """
-from typing import Dict
+from typing import Callable, Dict, Iterable, Iterator, List, MutableMapping, NamedTuple, Optional, TextIO, Tuple, Union
 from io import StringIO 
 from unittest.mock import patch
+from collections import Counter
+from operator import itemgetter
+from bisect import bisect_left, bisect_right, insort
+import argparse
+import asyncio
+import heapq
+import os
+import random
+import sqlite3
+import sys
+import tempfile
+import time
+
+from goit_pycore_hw_metrics import add_metrics_argument, configure, metrics
+
+# SQLite synchronous mode of each fsync policy of SQLiteContacts
+FSYNC_POLICIES = {"always": "FULL", "batch": "NORMAL", "never": "OFF"}
+# Default number of writes committed together
+WRITE_BATCH_SIZE = 1000
+# Default number of contacts on a page of the "all" command
+PAGE_SIZE = 20
+# Number of contacts read at once when the whole table is streamed
+STREAM_PAGE_SIZE = 1000
+# Widths of the columns of the contacts table
+NAME_WIDTH = 24
+PHONE_WIDTH = 16
+# Commands that stop the bot
+EXIT_COMMANDS = ("close", "exit", "quit", "q")
+# Number of response lines the batch mode writes at once
+OUTPUT_BLOCK_SIZE = 4096
+# Number of power-of-two buckets of the latency histograms, in microseconds
+LATENCY_BUCKETS = 32
+# Number of pending connections the server accepts
+SERVER_BACKLOG = 4096
+# Largest number of contacts shown by "find" and "fuzzy"
+SEARCH_LIMIT = 20
+# Largest edit distance of a "fuzzy" match
+FUZZY_DISTANCE = 2
+# Largest number of postings a fuzzy search counts and of names it compares, bounding its time
+FUZZY_POSTINGS = 8192
+FUZZY_CANDIDATES = 256
+
+# A command handler takes the arguments and the contacts and returns the response lines
+Handler = Callable[[tuple, MutableMapping[str, str]], Union[str, Iterable[str]]]
+# Handlers of the commands by name, filled by register_command
+COMMANDS: Dict[str, Handler] = {}
+# Canonical name of every command and alias, the first name given to register_command
+COMMAND_NAMES: Dict[str, str] = {}
+
+
+def register_command(*names: str) -> Callable[[Handler], Handler]:
+    """
+    Registers the decorated function as the handler of the commands.
+    
+    Parameters:
+    - names (str): The lowercase command and its aliases, the first one is the canonical name.
+    
+    Returns:
+    - Callable[[Handler], Handler]: The decorator.
+    """
+    def decorator(handler: Handler) -> Handler:
+        for name in names:
+            COMMANDS[name] = handler
+            COMMAND_NAMES[name] = names[0]
+        return handler
+    return decorator
+
+
+class SQLiteContacts(MutableMapping):
+    """
+    Contacts stored in a local SQLite file, a drop-in replacement for the contacts dictionary.
+    Contacts are read on demand, so opening a large book does not load it into memory.
+    Writes are committed in batches, the fsync policy controls how durable a commit is:
+    - "always": every write is committed and synced to disk;
+    - "batch": every batch_size writes are committed, the file is synced at checkpoints;
+    - "never": commits are left to the operating system.
+    """
+
+    def __init__(self, path: str, batch_size: int = WRITE_BATCH_SIZE, fsync: str = "batch"):
+        """
+        Parameters:
+        - path (str): The path to the database file, created if missing.
+        - batch_size (int): Number of writes committed together.
+        - fsync (str): The fsync policy, one of FSYNC_POLICIES.
+        """
+        if fsync not in FSYNC_POLICIES:
+            raise ValueError(f"Unknown fsync policy '{fsync}', expected one of {', '.join(FSYNC_POLICIES)}")
+        self.path = path
+        self.batch_size = 1 if fsync == "always" else max(1, batch_size)
+        self.pending = 0
+        self.connection = sqlite3.connect(path)
+        self.connection.execute("PRAGMA journal_mode = WAL")
+        self.connection.execute(f"PRAGMA synchronous = {FSYNC_POLICIES[fsync]}")
+        self.connection.execute(
+            "CREATE TABLE IF NOT EXISTS contacts (name TEXT PRIMARY KEY, phone TEXT NOT NULL) WITHOUT ROWID")
+        self.connection.commit()
+
+    def __getitem__(self, name: str) -> str:
+        row = self.connection.execute("SELECT phone FROM contacts WHERE name = ?", (name,)).fetchone()
+        if row is None:
+            raise KeyError(name)
+        return row[0]
+
+    def __setitem__(self, name: str, phone: str):
+        self.connection.execute(
+            "INSERT INTO contacts (name, phone) VALUES (?, ?) ON CONFLICT (name) DO UPDATE SET phone = excluded.phone",
+            (name, phone))
+        self._written()
+
+    def __delitem__(self, name: str):
+        if not self.connection.execute("DELETE FROM contacts WHERE name = ?", (name,)).rowcount:
+            raise KeyError(name)
+        self._written()
+
+    def __contains__(self, name: object) -> bool:
+        return self.connection.execute("SELECT 1 FROM contacts WHERE name = ?", (name,)).fetchone() is not None
+
+    def __iter__(self) -> Iterator[str]:
+        # fetch in pages so iterating does not hold a cursor across writes
+        items = self.items_after(None, PAGE_SIZE)
+        while items:
+            yield from map(itemgetter(0), items)
+            items = self.items_after(items[-1][0], PAGE_SIZE)
+
+    def items_after(self, after: Optional[str], limit: int, offset: int = 0) -> List[Tuple[str, str]]:
+        """
+        Returns a page of contacts sorted by name, read with the primary key index.
+        
+        Parameters:
+        - after (Optional[str]): The page starts after this name, from the first contact if None.
+        - limit (int): The page size.
+        - offset (int): Number of contacts skipped before the page.
+        
+        Returns:
+        - List[Tuple[str, str]]: The names and phone numbers of the page.
+        """
+        if after is None:
+            return self.connection.execute("SELECT name, phone FROM contacts ORDER BY name LIMIT ? OFFSET ?",
+                                           (limit, offset)).fetchall()
+        return self.connection.execute("SELECT name, phone FROM contacts WHERE name > ? ORDER BY name LIMIT ? OFFSET ?",
+                                       (after, limit, offset)).fetchall()
+
+    def __len__(self) -> int:
+        return self.connection.execute("SELECT count(*) FROM contacts").fetchone()[0]
+
+    def _written(self):
+        self.pending += 1
+        if self.pending >= self.batch_size:
+            self.commit()
+
+    def commit(self):
+        """
+        Commits the pending writes.
+        """
+        self.connection.commit()
+        self.pending = 0
+
+    def close(self):
+        """
+        Commits the pending writes and closes the database.
+        """
+        self.commit()
+        self.connection.close()
+
+
+def open_contacts(path: Optional[str] = None, batch_size: int = WRITE_BATCH_SIZE,
+                  fsync: str = "batch") -> MutableMapping[str, str]:
+    """
+    Opens the contacts storage backend.
+    
+    Parameters:
+    - path (Optional[str]): The path to the database file, None to keep the contacts in memory.
+    - batch_size (int): Number of writes committed together.
+    - fsync (str): The fsync policy, one of FSYNC_POLICIES.
+    
+    Returns:
+    - MutableMapping[str, str]: The IndexedContacts over a dictionary or a SQLiteContacts.
+    """
+    if path is None:
+        return IndexedContacts({})
+    return IndexedContacts(SQLiteContacts(path, batch_size, fsync))
+
+
+def edit_distance(a: str, b: str, limit: int) -> int:
+    """
+    Computes the Levenshtein distance of two strings, stopping early once it exceeds the limit.
+    The common prefix and suffix are skipped, so a typo costs a table of the differing middle parts only.
+    
+    Parameters:
+    - a (str): The first string.
+    - b (str): The second string.
+    - limit (int): The largest distance of interest.
+    
+    Returns:
+    - int: The distance, or limit + 1 if it is larger than the limit.
+    """
+    if abs(len(a) - len(b)) > limit:
+        return limit + 1
+    start = 0
+    while start < len(a) and start < len(b) and a[start] == b[start]:
+        start += 1
+    end_a, end_b = len(a), len(b)
+    while end_a > start and end_b > start and a[end_a - 1] == b[end_b - 1]:
+        end_a -= 1
+        end_b -= 1
+    a, b = a[start:end_a], b[start:end_b]
+    previous = list(range(len(b) + 1))
+    for i, char in enumerate(a, 1):
+        current = [i]
+        for j, other in enumerate(b, 1):
+            current.append(min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (char != other)))
+        if min(current) > limit:
+            return limit + 1
+        previous = current
+    return min(previous[-1], limit + 1)
+
+
+class TrigramIndex:
+    """
+    Index of the case-folded names by their trigrams, padded with a space at each end.
+    An edit changes at most three trigrams, so a name within d edits of the query holds all
+    but 3 * d of the query trigrams, and at least one of any 3 * d + 1 of them. The search counts
+    whole postings lists of the rarest query trigrams first, at most FUZZY_POSTINGS postings,
+    and compares the FUZZY_CANDIDATES names sharing the most of them with edit_distance, so its
+    time does not grow with the number of names. A match within d edits is among the names counted
+    at least c - 3 * d times out of c lists, so the search reports the largest distance up to which
+    all of those names were compared and no match can be missing.
+    Removed names leave a hole in the postings until the holes outnumber the names, then the
+    index is rebuilt from the remaining names.
+    """
+
+    def __init__(self):
+        self.names: List[Optional[str]] = []
+        self.ids: Dict[str, int] = {}
+        self.postings: Dict[str, List[int]] = {}
+        self.removed = 0
+
+    @staticmethod
+    def trigrams(key: str) -> set:
+        """
+        Returns the trigrams of the padded key.
+        """
+        padded = f" {key} "
+        return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+    def add(self, name: str):
+        """
+        Adds a name, one append per trigram.
+        """
+        if name in self.ids:
+            return
+        name_id = len(self.names)
+        self.ids[name] = name_id
+        for trigram in self.trigrams(name.casefold()):
+            self.postings.setdefault(trigram, []).append(name_id)
+        self.names.append(name)
+
+    def discard(self, name: str):
+        """
+        Removes a name, its postings are skipped until the index is compacted.
+        """
+        name_id = self.ids.pop(name, None)
+        if name_id is None:
+            return
+        self.names[name_id] = None
+        self.removed += 1
+        if self.removed > len(self.ids):
+            self.compact()
+
+    def compact(self):
+        """
+        Rebuilds the postings from the remaining names, dropping the holes of the removed ones.
+        """
+        names = [name for name in self.names if name is not None]
+        self.names = []
+        self.ids = {}
+        self.postings = {}
+        self.removed = 0
+        for name in names:
+            self.add(name)
+
+    def search(self, name: str, limit: int) -> Tuple[List[Tuple[int, str]], int]:
+        """
+        Finds the names within the edit distance of the name, ignoring case.
+        The distance is lowered for short names, so that a match shares at least one trigram:
+        exact matches up to 3 characters, one edit up to 6 characters.
+        
+        Parameters:
+        - name (str): The name to look for.
+        - limit (int): The largest edit distance.
+        
+        Returns:
+        - Tuple[List[Tuple[int, str]], int]: The distances and names, closest first, and the largest
+          distance up to which no match is missing: the limit if the search is complete, -1 if matches
+          of any distance may be missing.
+        """
+        key = name.casefold()
+        trigrams = self.trigrams(key)
+        requested = limit
+        limit = min(limit, (len(trigrams) - 1) // 3)
+        shared = Counter()
+        budget = FUZZY_POSTINGS
+        counted = 0
+        for postings in sorted((self.postings.get(trigram, ()) for trigram in trigrams), key=len):
+            if len(postings) > budget:
+                break
+            shared.update(postings)
+            budget -= len(postings)
+            counted += 1
+        # a match within d edits is counted at least counted - 3 * d times, at least once up to exact
+        exact = min(limit, (counted - 1) // 3)
+        needed = max(1, counted - 3 * limit)
+        candidates = [name_id for name_id, count in shared.items() if count >= needed]
+        if len(candidates) > FUZZY_CANDIDATES:
+            # the names sharing the most trigrams first, the distances whose names all fit stay exact
+            candidates.sort(key=shared.__getitem__, reverse=True)
+            exact = min(exact, (counted - shared[candidates[FUZZY_CANDIDATES]] - 1) // 3)
+            del candidates[FUZZY_CANDIDATES:]
+        needed = len(trigrams) - 3 * limit
+        found = []
+        for name_id in candidates:
+            match = self.names[name_id]
+            if match is None:
+                continue
+            other = match.casefold()
+            if abs(len(other) - len(key)) > limit:
+                continue
+            padded = f" {other} "
+            if sum(1 for trigram in trigrams if trigram in padded) >= needed:
+                distance = edit_distance(key, other, limit)
+                if distance <= limit:
+                    found.append((distance, match))
+        return sorted(found), requested if exact == limit else exact
+
+
+class FuzzyMatches(NamedTuple):
+    """
+    The result of a fuzzy search.
+
+    Attributes:
+    - names (List[str]): The matching names, closest first.
+    - exact (int): The largest edit distance up to which no match is missing, see TrigramIndex.search.
+    """
+    names: List[str]
+    exact: int
+
+
+class ContactIndex:
+    """
+    Search index of the contact names: a sorted list of (case-folded name, name) pairs
+    for prefix lookups by bisection and a TrigramIndex for edit-distance lookups.
+    """
+
+    def __init__(self, names: Iterable[str] = ()):
+        """
+        Parameters:
+        - names (Iterable[str]): The names to index.
+        """
+        self.names = sorted((name.casefold(), name) for name in names)
+        self.trigrams = TrigramIndex()
+        for _, name in self.names:
+            self.trigrams.add(name)
+
+    def add(self, name: str):
+        """
+        Adds a new name: a binary search and a list insertion, and an append per trigram.
+        """
+        insort(self.names, (name.casefold(), name))
+        self.trigrams.add(name)
+
+    def discard(self, name: str):
+        """
+        Removes a name if it is indexed.
+        """
+        entry = (name.casefold(), name)
+        i = bisect_left(self.names, entry)
+        if i < len(self.names) and self.names[i] == entry:
+            del self.names[i]
+            self.trigrams.discard(name)
+
+    def prefix(self, prefix: str, limit: int = SEARCH_LIMIT) -> List[str]:
+        """
+        Returns the names starting with the prefix, ignoring case, in alphabetical order.
+        """
+        key = prefix.casefold()
+        found = []
+        for i in range(bisect_left(self.names, (key,)), len(self.names)):
+            folded, name = self.names[i]
+            if not folded.startswith(key) or len(found) == limit:
+                break
+            found.append(name)
+        return found
+
+    def fuzzy(self, name: str, distance: int = FUZZY_DISTANCE, limit: int = SEARCH_LIMIT) -> "FuzzyMatches":
+        """
+        Returns the names within the edit distance of the name, ignoring case, closest first,
+        and the distance up to which the search was exact, see TrigramIndex.
+        """
+        found, exact = self.trigrams.search(name, distance)
+        return FuzzyMatches([match for _, match in found[:limit]], exact)
+
+
+class IndexedContacts(MutableMapping):
+    """
+    Contacts backend wrapper that keeps a ContactIndex of the names up to date.
+    The index is built on the first search, so opening a large book stays cheap.
+    A backend without a sorted key index of its own, a dictionary, also gets a sorted
+    list of the names, built on the first page, so the pages are found by bisection.
+    """
+
+    def __init__(self, backend: MutableMapping[str, str]):
+        """
+        Parameters:
+        - backend (MutableMapping[str, str]): A dictionary or a SQLiteContacts.
+        """
+        self.backend = backend
+        self._index = None
+        self._keys: Optional[List[str]] = None
+
+    @property
+    def index(self) -> ContactIndex:
+        """
+        The search index, built from the backend on first use.
+        """
+        if self._index is None:
+            self._index = ContactIndex(iter(self.backend))
+        return self._index
+
+    def __getitem__(self, name: str) -> str:
+        return self.backend[name]
+
+    def __setitem__(self, name: str, phone: str):
+        new = (self._index is not None or self._keys is not None) and name not in self.backend
+        self.backend[name] = phone
+        if new:
+            if self._index is not None:
+                self._index.add(name)
+            if self._keys is not None:
+                insort(self._keys, name)
+
+    def __delitem__(self, name: str):
+        del self.backend[name]
+        if self._index is not None:
+            self._index.discard(name)
+        if self._keys is not None:
+            del self._keys[bisect_left(self._keys, name)]
+
+    def __contains__(self, name: object) -> bool:
+        return name in self.backend
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.backend)
+
+    def __len__(self) -> int:
+        return len(self.backend)
+
+    def items_after(self, after: Optional[str], limit: int, offset: int = 0) -> List[Tuple[str, str]]:
+        """
+        Returns a page of contacts sorted by name, see contacts_after. The page of a backend
+        without items_after is sliced from the sorted names, the offset costs nothing.
+        """
+        if hasattr(self.backend, "items_after"):
+            return self.backend.items_after(after, limit, offset)
+        if self._keys is None:
+            self._keys = sorted(self.backend)
+        start = (0 if after is None else bisect_right(self._keys, after)) + offset
+        return [(name, self.backend[name]) for name in self._keys[start:start + limit]]
+
+    def close(self):
+        """
+        Closes the backend if it needs closing.
+        """
+        if hasattr(self.backend, "close"):
+            self.backend.close()
+
+
+def contacts_after(contacts: MutableMapping[str, str], after: Optional[str], limit: int,
+                   offset: int = 0) -> List[Tuple[str, str]]:
+    """
+    Returns a page of contacts sorted by name. A backend with a sorted key index, an IndexedContacts
+    or a SQLiteContacts, serves the page itself, a plain dictionary is scanned keeping at most
+    offset + limit contacts in memory.
+    
+    Parameters:
+    - contacts (MutableMapping[str, str]): The contacts, a dictionary or a storage backend.
+    - after (Optional[str]): The page starts after this name, from the first contact if None.
+    - limit (int): The page size.
+    - offset (int): Number of contacts skipped before the page.
+    
+    Returns:
+    - List[Tuple[str, str]]: The names and phone numbers of the page.
+    """
+    if hasattr(contacts, "items_after"):
+        return contacts.items_after(after, limit, offset)
+    items = contacts.items() if after is None else (item for item in contacts.items() if item[0] > after)
+    return heapq.nsmallest(offset + limit, items, key=itemgetter(0))[offset:]
+
+def format_contact(name: str, phone: str) -> str:
+    """
+    Formats a row of the contacts table, cutting the values longer than the columns.
+    
+    Parameters:
+    - name (str): The name of the contact.
+    - phone (str): The phone number of the contact.
+    
+    Returns:
+    - str: The fixed-width row.
+    """
+    if len(name) > NAME_WIDTH:
+        name = name[:NAME_WIDTH - 1] + "…"
+    if len(phone) > PHONE_WIDTH:
+        phone = phone[:PHONE_WIDTH - 1] + "…"
+    return f"{name:<{NAME_WIDTH}} {phone:<{PHONE_WIDTH}}"
+
+
+class ContactsPager:
+    """
+    Renders the contacts table page by page, remembering the last name shown
+    so that "all next" continues from it, or the whole table as a stream of pages.
+    """
+
+    def __init__(self, contacts: MutableMapping[str, str]):
+        """
+        Parameters:
+        - contacts (MutableMapping[str, str]): The contacts, a dictionary or a storage backend.
+        """
+        self.contacts = contacts
+        self.cursor = None
+        self.page_size = PAGE_SIZE
+
+    def page(self, args: tuple) -> Iterator[str]:
+        """
+        Yields the rows of a page of the contacts table, one line at a time.
+        
+        Parameters:
+        - args (tuple): The page number and optional page size, "next" to continue after the last name shown,
+          or "stream" for the whole table.
+        
+        Returns:
+        - Iterator[str]: The lines of the page or a message.
+        """
+        if args[0].lower() == "stream":
+            return self.stream()
+        if args[0].lower() == "next":
+            if self.cursor is None:
+                return iter(["No page shown yet."])
+            items = contacts_after(self.contacts, self.cursor, self.page_size)
+        else:
+            try:
+                number = int(args[0])
+                size = int(args[1]) if len(args) > 1 else self.page_size
+            except ValueError:
+                return iter(["Invalid page."])
+            if number < 1 or size < 1:
+                return iter(["Invalid page."])
+            self.page_size = size
+            items = contacts_after(self.contacts, None, size, (number - 1) * size)
+        if not items:
+            return iter(["No more contacts."])
+        return self._render(items)
+
+    def stream(self) -> Iterator[str]:
+        """
+        Yields the whole contacts table, one line at a time, walking the pages by keyset
+        so that one page of STREAM_PAGE_SIZE contacts is in memory at a time.
+        """
+        yield format_contact("Name", "Phone")
+        if not hasattr(self.contacts, "items_after"):
+            # a plain dictionary has no sorted key index to walk, so it is sorted once
+            for name, phone in sorted(self.contacts.items()):
+                yield format_contact(name, phone)
+            return
+        items = self.contacts.items_after(None, STREAM_PAGE_SIZE)
+        while items:
+            for name, phone in items:
+                yield format_contact(name, phone)
+            items = self.contacts.items_after(items[-1][0], STREAM_PAGE_SIZE)
+
+    def _render(self, items: List[Tuple[str, str]]) -> Iterator[str]:
+        yield format_contact("Name", "Phone")
+        for name, phone in items:
+            self.cursor = name
+            yield format_contact(name, phone)
 
 def parse_input(user_input: str) -> tuple:
     """
@@ -30,13 +613,34 @@ def parse_input(user_input: str) -> tuple:
     cmd = cmd.strip().lower()
     return cmd, *args
 
-def add_contact(args: tuple, contacts: Dict[str, str]) -> str:
+@register_command("hello")
+def say_hello(args: tuple, contacts: MutableMapping[str, str]) -> str:
+    """
+    Greets the user.
+    
+    Returns:
+    - str: The greeting.
+    """
+    return "How can I help you?"
+
+@register_command(*EXIT_COMMANDS)
+def say_goodbye(args: tuple, contacts: MutableMapping[str, str]) -> str:
+    """
+    Says goodbye, the bot stops after any of EXIT_COMMANDS.
+    
+    Returns:
+    - str: The farewell.
+    """
+    return "Good bye!"
+
+@register_command("add")
+def add_contact(args: tuple, contacts: MutableMapping[str, str]) -> str:
     """
     Adds a new contact to the contacts dictionary.
     
     Parameters:
     - args (tuple): A tuple containing the name and phone number of the contact.
-    - contacts (Dict[str, str]): The dictionary of contacts.
+    - contacts (MutableMapping[str, str]): The contacts, a dictionary or a storage backend.
     
     Returns:
     - str: A message indicating the contact was added.
@@ -45,13 +649,14 @@ def add_contact(args: tuple, contacts: Dict[str, str]) -> str:
     contacts[name] = phone
     return "Contact added."
 
-def change_contact(args: tuple, contacts: Dict[str, str]) -> str:
+@register_command("change")
+def change_contact(args: tuple, contacts: MutableMapping[str, str]) -> str:
     """
     Changes the phone number of an existing contact.
     
     Parameters:
     - args (tuple): A tuple containing the name and new phone number of the contact.
-    - contacts (Dict[str, str]): The dictionary of contacts.
+    - contacts (MutableMapping[str, str]): The contacts, a dictionary or a storage backend.
     
     Returns:
     - str: A message indicating the contact was updated or not found.
@@ -62,13 +667,14 @@ def change_contact(args: tuple, contacts: Dict[str, str]) -> str:
         return "Contact updated."
     return "Contact not found."
 
-def show_phone(args: tuple, contacts: Dict[str, str]) -> str:
+@register_command("phone")
+def show_phone(args: tuple, contacts: MutableMapping[str, str]) -> str:
     """
     Retrieves the phone number of a specified contact.
     
     Parameters:
     - args (tuple): A tuple containing the name of the contact.
-    - contacts (Dict[str, str]): The dictionary of contacts.
+    - contacts (MutableMapping[str, str]): The contacts, a dictionary or a storage backend.
     
     Returns:
     - str: The phone number of the contact or a message indicating the contact was not found.
@@ -78,45 +684,551 @@ def show_phone(args: tuple, contacts: Dict[str, str]) -> str:
         return contacts[name]
     return "Contact not found."
 
-def show_all(contacts: Dict[str, str]) -> str:
+def show_all(contacts: MutableMapping[str, str]) -> str:
     """
     Returns a string representation of all contacts.
     
     Parameters:
-    - contacts (Dict[str, str]): The dictionary of contacts.
+    - contacts (MutableMapping[str, str]): The contacts, a dictionary or a storage backend.
     
     Returns:
     - str: A string representation of the contacts dictionary.
     """
-    return str(contacts)
+    return str(dict(contacts))
+
+def contacts_index(contacts: MutableMapping[str, str]) -> ContactIndex:
+    """
+    Returns the search index of the contacts, built on the fly for a plain dictionary.
+    """
+    if isinstance(contacts, IndexedContacts):
+        return contacts.index
+    return ContactIndex(contacts)
+
+@register_command("find")
+def find_contacts(args: tuple, contacts: MutableMapping[str, str]) -> Iterable[str]:
+    """
+    Finds the contacts whose name starts with the prefix, ignoring case.
+    
+    Parameters:
+    - args (tuple): A tuple containing the name prefix.
+    - contacts (MutableMapping[str, str]): The contacts, a dictionary or a storage backend.
+    
+    Returns:
+    - Iterable[str]: The rows of the matching contacts or a message indicating none was found.
+    """
+    prefix, *_ = args
+    names = contacts_index(contacts).prefix(prefix)
+    return [format_contact(name, contacts[name]) for name in names] or ["Contact not found."]
+
+@register_command("fuzzy")
+def fuzzy_contacts(args: tuple, contacts: MutableMapping[str, str]) -> Iterable[str]:
+    """
+    Finds the contacts whose name is within FUZZY_DISTANCE edits of the name, ignoring case.
+    
+    Parameters:
+    - args (tuple): A tuple containing the name.
+    - contacts (MutableMapping[str, str]): The contacts, a dictionary or a storage backend.
+    
+    Returns:
+    - Iterable[str]: The rows of the matching contacts, closest first, or a message indicating none was found,
+      followed by a warning if matches may be missing.
+    """
+    name, *_ = args
+    names, exact = contacts_index(contacts).fuzzy(name)
+    rows = [format_contact(name, contacts[name]) for name in names] or ["Contact not found."]
+    if exact < 0:
+        rows.append("Results may be incomplete, the name is too common to search exactly.")
+    elif exact < FUZZY_DISTANCE:
+        rows.append(f"Results may be incomplete beyond {exact} edit(s).")
+    return rows
+
+
+class CommandStats:
+    """
+    Call counts and latency histograms of the commands. A histogram counts the calls
+    in power-of-two buckets of microseconds: bucket i holds the calls shorter than 2**i µs.
+    """
+
+    def __init__(self):
+        self.calls = Counter()
+        self.nanoseconds = Counter()
+        self.histograms: Dict[str, List[int]] = {}
 
-def main():
+    def record(self, command: str, nanoseconds: int):
+        """
+        Adds a call of the command.
+        
+        Parameters:
+        - command (str): The command.
+        - nanoseconds (int): The latency of the call.
+        """
+        self.calls[command] += 1
+        self.nanoseconds[command] += nanoseconds
+        histogram = self.histograms.get(command)
+        if histogram is None:
+            histogram = self.histograms[command] = [0] * LATENCY_BUCKETS
+        histogram[min((nanoseconds // 1000).bit_length(), LATENCY_BUCKETS - 1)] += 1
+
+    def percentile(self, command: str, fraction: float) -> int:
+        """
+        Returns the upper bound in microseconds of the bucket holding the percentile of the latency.
+        
+        Parameters:
+        - command (str): The command.
+        - fraction (float): The percentile as a fraction, 0.99 for p99.
+        
+        Returns:
+        - int: The latency bound in microseconds.
+        """
+        rank = fraction * self.calls[command]
+        seen = 0
+        for bucket, count in enumerate(self.histograms[command]):
+            seen += count
+            if seen >= rank:
+                return 1 << bucket
+        return 1 << (LATENCY_BUCKETS - 1)
+
+    def __str__(self) -> str:
+        if not self.calls:
+            return "No commands yet."
+        lines = [f"{'Command':<10} {'Calls':>10} {'Mean µs':>10} {'p50 µs':>10} {'p99 µs':>10}"]
+        for command in sorted(self.calls):
+            mean = self.nanoseconds[command] / self.calls[command] / 1000
+            lines.append(f"{command:<10} {self.calls[command]:>10} {mean:>10.1f} "
+                         f"{'≤' + str(self.percentile(command, 0.5)):>10} {'≤' + str(self.percentile(command, 0.99)):>10}")
+        return "\n".join(lines)
+
+
+class Dispatcher:
+    """
+    Routes the commands to their handlers with a dictionary lookup and records
+    the call count and latency of every command under its canonical name. The registered
+    COMMANDS are looked up on every dispatch, so commands registered later are handled too.
+    Besides them, a dispatcher handles "all" with its own pager and "stats" with its own statistics.
+    """
+
+    def __init__(self, contacts: MutableMapping[str, str], stats: Optional[CommandStats] = None):
+        """
+        Parameters:
+        - contacts (MutableMapping[str, str]): The contacts, a dictionary or a storage backend.
+        - stats (Optional[CommandStats]): The statistics to record into, new ones by default.
+        """
+        self.contacts = contacts
+        self.pager = ContactsPager(contacts)
+        self.stats = CommandStats() if stats is None else stats
+        self.overrides: Dict[str, Handler] = {"all": self.show_all, "stats": self.show_stats}
+
+    def handler(self, command: str) -> Optional[Handler]:
+        """
+        Returns the handler of the command, None for an unknown command.
+        
+        Parameters:
+        - command (str): The lowercase command.
+        
+        Returns:
+        - Optional[Handler]: The handler.
+        """
+        handler = self.overrides.get(command)
+        return COMMANDS.get(command) if handler is None else handler
+
+    def dispatch(self, command: str, args: tuple) -> Iterable[str]:
+        """
+        Runs the command.
+        
+        Parameters:
+        - command (str): The lowercase command.
+        - args (tuple): The arguments of the command.
+        
+        Returns:
+        - Iterable[str]: The lines of the response.
+        """
+        handler = self.handler(command)
+        if handler is None:
+            return ["Invalid command."]
+        started = time.perf_counter_ns()
+        try:
+            response = handler(args, self.contacts)
+        finally:
+            self.stats.record(COMMAND_NAMES.get(command, command), time.perf_counter_ns() - started)
+            metrics.count("bot.commands")
+        return [response] if isinstance(response, str) else response
+
+    def show_all(self, args: tuple, contacts: MutableMapping[str, str]) -> Union[str, Iterable[str]]:
+        """
+        Shows all contacts, or a page of them if a page number or "next" is given,
+        or streams the whole table for "stream".
+        """
+        return self.pager.page(args) if args else show_all(contacts)
+
+    def show_stats(self, args: tuple, contacts: MutableMapping[str, str]) -> str:
+        """
+        Shows the call counts and latencies of the commands.
+        """
+        return str(self.stats)
+
+
+class BatchReport(NamedTuple):
+    """
+    Summary of a run of the batch mode.
+    
+    Attributes:
+    - commands (int): Number of processed commands.
+    - seconds (float): Wall time of the run.
+    - errors (Dict[str, int]): Number of failed commands per command.
+    """
+    commands: int
+    seconds: float
+    errors: Dict[str, int]
+
+    def __str__(self) -> str:
+        rate = self.commands / self.seconds if self.seconds else 0
+        lines = [f"Processed {self.commands} commands in {self.seconds:.2f} s ({rate:.0f} commands/s)"]
+        lines.extend(f"{command}: {count} errors" for command, count in sorted(self.errors.items()))
+        return "\n".join(lines)
+
+
+@metrics.timed("bot")
+def run_batch(commands: Iterable[str], contacts: MutableMapping[str, str], out: TextIO,
+              block_size: int = OUTPUT_BLOCK_SIZE) -> BatchReport:
+    """
+    Runs scripted commands without prompting, writing the responses to the stream in blocks.
+    A command with wrong arguments or an unknown command is counted as an error, and the run
+    goes on until the end of the script or an exit command.
+    
+    Parameters:
+    - commands (Iterable[str]): The command lines, empty lines are skipped.
+    - contacts (MutableMapping[str, str]): The contacts, a dictionary or a storage backend.
+    - out (TextIO): The stream for the responses.
+    - block_size (int): Number of response lines written at once.
+    
+    Returns:
+    - BatchReport: The number of commands, the wall time and the errors per command.
+    """
+    dispatcher = Dispatcher(contacts)
+    errors = Counter()
+    buffer = []
+    processed = 0
+    started = time.perf_counter()
+    for user_input in commands:
+        if user_input.isspace() or not user_input:
+            continue
+        command, *args = parse_input(user_input)
+        processed += 1
+        if dispatcher.handler(command) is None:
+            errors[command] += 1
+        try:
+            for line in dispatcher.dispatch(command, args):
+                # a streamed response is written in blocks as well
+                buffer.append(line)
+                if len(buffer) >= block_size:
+                    buffer.append("")
+                    out.write("\n".join(buffer))
+                    buffer.clear()
+        except ValueError:
+            buffer.append("Invalid arguments.")
+            errors[command] += 1
+        if command in EXIT_COMMANDS:
+            break
+    if buffer:
+        buffer.append("")
+        out.write("\n".join(buffer))
+    out.flush()
+    return BatchReport(processed, time.perf_counter() - started, dict(errors))
+
+async def handle_session(reader: asyncio.StreamReader, writer: asyncio.StreamWriter,
+                         contacts: MutableMapping[str, str], stats: CommandStats,
+                         block_size: int = OUTPUT_BLOCK_SIZE):
+    """
+    Serves a client of the server mode: one command per line, each response is followed by an empty line.
+    The commands of all sessions run one at a time on the event loop, so the writes
+    of "add" and "change" to the shared contacts are serialised without locks.
+    A command that fails is answered with an error line and logged, the session goes on.
+    
+    Parameters:
+    - reader (asyncio.StreamReader): The stream of the client commands.
+    - writer (asyncio.StreamWriter): The stream of the responses.
+    - contacts (MutableMapping[str, str]): The contacts shared by the sessions.
+    - stats (CommandStats): The statistics shared by the sessions.
+    - block_size (int): Number of response lines written at once.
+    """
+    dispatcher = Dispatcher(contacts, stats)
+    writer.write(b"Welcome to the assistant bot!\n\n")
+    try:
+        while line := await reader.readline():
+            user_input = line.decode('utf-8', 'replace')
+            if user_input.isspace():
+                continue
+            command, *args = parse_input(user_input)
+            buffer = []
+            try:
+                for response_line in dispatcher.dispatch(command, args):
+                    # a streamed response is sent in blocks, not collected whole
+                    buffer.append(response_line)
+                    if len(buffer) >= block_size:
+                        buffer.append("")
+                        writer.write("\n".join(buffer).encode('utf-8'))
+                        buffer.clear()
+                        await writer.drain()
+            except ValueError:
+                buffer.append("Invalid arguments.")
+            except ConnectionError:
+                raise
+            except Exception as error:
+                print(f"Command {command!r} failed: {error!r}", file=sys.stderr)
+                buffer.append("Command failed.")
+            buffer.append("\n")
+            writer.write("\n".join(buffer).encode('utf-8'))
+            await writer.drain()
+            if command in EXIT_COMMANDS:
+                break
+    except ConnectionError:
+        pass
+    finally:
+        writer.close()
+        try:
+            await writer.wait_closed()
+        except ConnectionError:
+            pass
+
+async def serve(contacts: MutableMapping[str, str], address: str) -> asyncio.AbstractServer:
+    """
+    Starts the server mode, many sessions share the contacts.
+    
+    Parameters:
+    - contacts (MutableMapping[str, str]): The contacts shared by the sessions.
+    - address (str): "host:port" of a TCP socket or the path of a Unix socket.
+    
+    Returns:
+    - asyncio.AbstractServer: The started server.
+    """
+    stats = CommandStats()
+
+    async def session(reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        await handle_session(reader, writer, contacts, stats)
+
+    host, port = parse_address(address)
+    if port is None:
+        return await asyncio.start_unix_server(session, host, backlog=SERVER_BACKLOG)
+    return await asyncio.start_server(session, host, port, backlog=SERVER_BACKLOG)
+
+def parse_address(address: str) -> Tuple[str, Optional[int]]:
+    """
+    Splits a server address.
+    
+    Parameters:
+    - address (str): "host:port" of a TCP socket or the path of a Unix socket.
+    
+    Returns:
+    - Tuple[str, Optional[int]]: The host and port, or the socket path and None.
+    """
+    host, separator, port = address.rpartition(":")
+    if separator and port.isdigit() and "/" not in address:
+        return host or "127.0.0.1", int(port)
+    return address, None
+
+async def open_connection(address: str) -> Tuple[asyncio.StreamReader, asyncio.StreamWriter]:
+    """
+    Connects to the server mode.
+    
+    Parameters:
+    - address (str): "host:port" of a TCP socket or the path of a Unix socket.
+    
+    Returns:
+    - Tuple[asyncio.StreamReader, asyncio.StreamWriter]: The streams of the connection.
+    """
+    host, port = parse_address(address)
+    if port is None:
+        return await asyncio.open_unix_connection(host)
+    return await asyncio.open_connection(host, port)
+
+
+class LoadReport(NamedTuple):
+    """
+    Result of a load test of the server mode.
+    
+    Attributes:
+    - clients (int): Number of simulated clients.
+    - commands (int): Number of answered commands.
+    - seconds (float): Wall time of the test.
+    - latencies (List[float]): Sorted round-trip times of the commands in seconds.
+    """
+    clients: int
+    commands: int
+    seconds: float
+    latencies: List[float]
+
+    def percentile(self, fraction: float) -> float:
+        """
+        Returns the latency percentile in seconds, fraction is 0.99 for p99.
+        """
+        if not self.latencies:
+            return 0.0
+        return self.latencies[min(len(self.latencies) - 1, int(fraction * len(self.latencies)))]
+
+    def __str__(self) -> str:
+        rate = self.commands / self.seconds if self.seconds else 0
+        return (f"{self.clients} clients, {self.commands} commands in {self.seconds:.2f} s "
+                f"({rate:.0f} commands/s), p50 {self.percentile(0.5) * 1000:.2f} ms, "
+                f"p99 {self.percentile(0.99) * 1000:.2f} ms")
+
+
+async def simulate_client(address: str, client: int, requests: int, latencies: List[float]):
+    """
+    Sends add, change and phone commands for a new contact in turn and records their round-trip times.
+    
+    Parameters:
+    - address (str): The server address.
+    - client (int): The number of the client, used in the contact names.
+    - requests (int): Number of commands to send.
+    - latencies (List[float]): The list to append the round-trip times to.
+    """
+    reader, writer = await open_connection(address)
+    await reader.readuntil(b"\n\n")
+    try:
+        for i in range(requests):
+            name = f"client{client}_{i // 3}"
+            command = ("add", "change", "phone")[i % 3]
+            line = f"{command} {name} {i}\n" if command != "phone" else f"phone {name}\n"
+            started = time.perf_counter()
+            writer.write(line.encode('utf-8'))
+            await reader.readuntil(b"\n\n")
+            latencies.append(time.perf_counter() - started)
+        writer.write(b"close\n")
+        await reader.readuntil(b"\n\n")
+    finally:
+        writer.close()
+
+async def load_test(address: str, clients: int = 1000, requests: int = 100) -> LoadReport:
+    """
+    Runs concurrent simulated clients against the server mode.
+    
+    Parameters:
+    - address (str): The server address.
+    - clients (int): Number of concurrent clients.
+    - requests (int): Number of commands each client sends.
+    
+    Returns:
+    - LoadReport: The throughput and the latencies of the commands.
+    """
+    latencies = []
+    started = time.perf_counter()
+    await asyncio.gather(*(simulate_client(address, client, requests, latencies) for client in range(clients)))
+    seconds = time.perf_counter() - started
+    latencies.sort()
+    return LoadReport(clients, len(latencies), seconds, latencies)
+
+async def run_server(contacts: MutableMapping[str, str], address: str):
+    """
+    Runs the server mode until it is interrupted.
+    
+    Parameters:
+    - contacts (MutableMapping[str, str]): The contacts shared by the sessions.
+    - address (str): "host:port" of a TCP socket or the path of a Unix socket.
+    """
+    server = await serve(contacts, address)
+    print(f"Serving the assistant bot on {address}", file=sys.stderr)
+    async with server:
+        await server.serve_forever()
+
+def main(contacts: Optional[MutableMapping[str, str]] = None):
     """
     The main function of the assistant bot. It initializes the contacts dictionary and processes user commands.
+    
+    Parameters:
+    - contacts (Optional[MutableMapping[str, str]]): The contacts storage backend, an empty IndexedContacts by default.
     """
-    contacts = {}
+    if contacts is None:
+        contacts = IndexedContacts({})
+    dispatcher = Dispatcher(contacts)
     print("Welcome to the assistant bot!")
     while True:
         user_input = input("Enter a command: ")
         command, *args = parse_input(user_input)
-
-        if command.lower() in ["close", "exit", "quit", "q"]:
-            print("Good bye!")
+        for line in dispatcher.dispatch(command, args):
+            print(line)
+        if command in EXIT_COMMANDS:
             break
-        elif command == "hello":
-            print("How can I help you?")
-        elif command == "add":
-            print(add_contact(args, contacts))
-        elif command == "change":
-            print(change_contact(args, contacts))
-        elif command == "phone":
-            print(show_phone(args, contacts))
-        elif command == "all":
-            print(show_all(contacts))
+
+def run(argv: Optional[List[str]] = None):
+    """
+    Parses the command line arguments, opens the contacts storage backend and starts the bot.
+    
+    Parameters:
+    - argv (Optional[List[str]]): The command line arguments, sys.argv by default.
+    """
+    parser = argparse.ArgumentParser(description="Assistant bot")
+    parser.add_argument("--db", help="SQLite file to keep the contacts in, in memory if omitted")
+    parser.add_argument("--fsync", choices=list(FSYNC_POLICIES), default="batch", help="Durability of the writes")
+    parser.add_argument("--batch-size", type=int, default=WRITE_BATCH_SIZE, help="Number of writes committed together")
+    parser.add_argument("--script", help="Run the commands of the file without prompting, '-' to read them from stdin")
+    parser.add_argument("--serve", metavar="ADDRESS", help="Serve many sessions on host:port or a Unix socket path")
+    parser.add_argument("--load-test", metavar="ADDRESS", help="Load test the server running on the address")
+    parser.add_argument("--clients", type=int, default=1000, help="Number of clients of the load test")
+    parser.add_argument("--requests", type=int, default=100, help="Number of commands of each client of the load test")
+    add_metrics_argument(parser)
+    args = parser.parse_args(argv)
+    configure(args.metrics)
+    if args.load_test:
+        print(asyncio.run(load_test(args.load_test, args.clients, args.requests)))
+        return
+    contacts = open_contacts(args.db, args.batch_size, args.fsync)
+    try:
+        if args.serve:
+            asyncio.run(run_server(contacts, args.serve))
+        elif args.script == "-":
+            print(run_batch(sys.stdin, contacts, sys.stdout), file=sys.stderr)
+        elif args.script:
+            with open(args.script, 'r', encoding='utf-8') as script:
+                print(run_batch(script, contacts, sys.stdout), file=sys.stderr)
         else:
-            print("Invalid command.")
+            main(contacts)
+    finally:
+        contacts.close()
             
 # add block with tests for the functions
+def benchmark_contact_search(names: int = 1_000_000, searches: int = 1000, seed: int = 0):
+    """
+    Measures the fuzzy search of a ContactIndex of generated "First Last" names with one and two typos,
+    printing the median, 99th percentile and largest search times, the share of the searches that
+    find the name the typos were made in and the shares of the searches exact up to one and two edits.
+    
+    Parameters:
+    - names (int): Number of generated names.
+    - searches (int): Number of searches with each number of typos.
+    - seed (int): The seed of the random generator.
+    """
+    generator = random.Random(seed)
+    first_names = ("Alex", "Nikita", "Sitarama", "Olena", "Ivan", "Maria", "John", "Anna", "Taras", "Sofia")
+    book = set()
+    while len(book) < names:
+        syllables = [generator.choice("bcdfghjklmnprstvz") + generator.choice("aeiouy")
+                     for _ in range(generator.randint(2, 4))]
+        last_name = "".join(syllables)
+        book.add(f"{generator.choice(first_names)} {last_name.capitalize()}")
+    book = sorted(book)
+    started = time.perf_counter()
+    index = ContactIndex(book)
+    print(f"index of {len(book)} names built in {time.perf_counter() - started:.1f} s")
+    for typos in (1, 2):
+        times = []
+        found = 0
+        exact = Counter()
+        for _ in range(searches):
+            name = generator.choice(book)
+            query = list(name)
+            for position in generator.sample(range(len(query)), typos):
+                query[position] = "#"
+            started = time.perf_counter()
+            matches, distance = index.fuzzy("".join(query))
+            times.append(time.perf_counter() - started)
+            found += name in matches
+            exact.update(range(distance + 1))
+        times.sort()
+        print(f"{typos} typo(s): median {times[len(times) // 2] * 1000:.3f} ms, "
+              f"p99 {times[len(times) * 99 // 100] * 1000:.3f} ms, max {times[-1] * 1000:.3f} ms, "
+              f"found {found / searches:.1%}, exact to 1 edit {exact[1] / searches:.1%}, "
+              f"to 2 edits {exact[2] / searches:.1%}")
+
 def test_functions():
     contacts = {}
     assert add_contact(("John", "123456"), contacts) == "Contact added."
@@ -154,9 +1266,218 @@ def test_main():
                 "Test main function is failed output is not equal to expected"
     print("The main function tests passed.")
             
+def test_sqlite_contacts():
+    with tempfile.TemporaryDirectory() as temp_dir:
+        path = os.path.join(temp_dir, "contacts.db")
+        contacts = open_contacts(path, batch_size=2)
+        # Test the command functions work with the SQLite backend
+        assert add_contact(("John", "123456"), contacts) == "Contact added."
+        assert change_contact(("John", "098765"), contacts) == "Contact updated."
+        assert change_contact(("Bob", "123456"), contacts) == "Contact not found."
+        assert show_phone(("John",), contacts) == "098765"
+        assert show_phone(("Bob",), contacts) == "Contact not found."
+        assert add_contact(("Alice", "987654"), contacts) == "Contact added."
+        assert show_all(contacts) == "{'Alice': '987654', 'John': '098765'}"
+        # Test the writes are committed in batches
+        reader = SQLiteContacts(path)
+        assert len(reader) == 1, "Only the first batch of writes is committed"
+        contacts.close()
+        assert dict(reader) == {"Alice": "987654", "John": "098765"}, "All writes are committed on close"
+        reader.close()
+        # Test the contacts survive a restart
+        with patch("builtins.input", side_effect=["phone Alice", "close"]):
+            with patch("sys.stdout", new_callable=StringIO) as fake_out:
+                run(["--db", path, "--fsync", "always"])
+                assert fake_out.getvalue().split("\n")[1] == "987654", "Contact is read from the database"
+    print("All SQLite contacts tests passed.")
+
+def test_contacts_pager():
+    with tempfile.TemporaryDirectory() as temp_dir:
+        for contacts in ({}, open_contacts(), open_contacts(os.path.join(temp_dir, "contacts.db"))):
+            for i in range(25, 0, -1):
+                contacts[f"User{i:02}"] = f"{i:06}"
+            pager = ContactsPager(contacts)
+            # Test the page number and size
+            assert list(pager.page(("next",))) == ["No page shown yet."]
+            lines = list(pager.page(("2", "10")))
+            assert len(lines) == 11 and lines[1] == format_contact("User11", "000011"), "Second page of 10 contacts"
+            assert lines[0].split() == ["Name", "Phone"] and len(set(map(len, lines))) == 1, "Fixed-width table"
+            # Test the cursor continues from the last name shown
+            assert list(pager.page(("next",)))[1:] == [format_contact(f"User{i}", f"0000{i}") for i in range(21, 26)]
+            assert list(pager.page(("next",))) == ["No more contacts."]
+            assert list(pager.page(("0",))) == list(pager.page(("x",))) == ["Invalid page."]
+            # Test the whole table is streamed in name order, after writes to the sorted names
+            contacts["User00"] = "000000"
+            del contacts["User13"]
+            assert list(contacts_after(contacts, "User12", 2)) == [("User14", "000014"), ("User15", "000015")]
+            lines = list(pager.page(("stream",)))
+            assert lines[0].split() == ["Name", "Phone"] and len(lines) == 26
+            assert lines[1:] == [format_contact(f"User{i:02}", f"{i:06}") for i in range(26) if i != 13]
+            # Test long values are cut to the column width
+            assert len(format_contact("N" * 50, "1" * 50)) == NAME_WIDTH + PHONE_WIDTH + 1
+            if hasattr(contacts, "close"):
+                contacts.close()
+    print("All contacts pager tests passed.")
+
+def test_run_batch():
+    script = ["hello\n", "add John 123456\n", "\n", "add Alice\n", "change Bob 1\n", "phone John\n",
+              "wrong_command\n", "add Alice 987654\n", "all\n", "exit\n", "add Bob 1\n"]
+    contacts = {}
+    out = StringIO()
+    report = run_batch(script, contacts, out, block_size=2)
+    assert out.getvalue().split("\n") == ["How can I help you?", "Contact added.", "Invalid arguments.",
+                                          "Contact not found.", "123456", "Invalid command.", "Contact added.",
+                                          "{'John': '123456', 'Alice': '987654'}", "Good bye!", ""]
+    assert report.commands == 9 and report.errors == {"add": 1, "wrong_command": 1}, "Commands and errors are counted"
+    assert "9 commands" in str(report) and "add: 1 errors" in str(report)
+    # Test a streamed table is written in blocks
+    contacts = open_contacts()
+    for i in range(STREAM_PAGE_SIZE + 5):
+        contacts[f"User{i:04}"] = str(i)
+    out = StringIO()
+    run_batch(["all stream\n", "phone User0000\n"], contacts, out, block_size=64)
+    lines = out.getvalue().split("\n")
+    assert len(lines) == STREAM_PAGE_SIZE + 8 and lines[-3] == format_contact("User1004", "1004") and lines[-2] == "0"
+    print("All batch mode tests passed.")
+
+def test_dispatcher():
+    dispatcher = Dispatcher({})
+    assert list(dispatcher.dispatch("add", ("John", "123456"))) == ["Contact added."]
+    assert list(dispatcher.dispatch("phone", ("John",))) == ["123456"]
+    assert list(dispatcher.dispatch("q", ())) == ["Good bye!"]
+    assert list(dispatcher.dispatch("wrong_command", ())) == ["Invalid command."]
+    # Test a command registered without editing main, after the dispatcher is created
+    try:
+        register_command("count", "len")(lambda args, contacts: str(len(contacts)))
+        assert list(dispatcher.dispatch("len", ())) == ["1"]
+    finally:
+        for name in ("count", "len"):
+            del COMMANDS[name], COMMAND_NAMES[name]
+    # Test the call counts and latencies, recorded under the canonical names
+    assert list(dispatcher.dispatch("quit", ())) == ["Good bye!"]
+    stats = dispatcher.stats
+    assert stats.calls == {"add": 1, "phone": 1, "close": 2, "count": 1}, "Unknown commands are not recorded"
+    assert sum(stats.histograms["add"]) == 1 and stats.percentile("add", 0.99) >= 1
+    lines = list(dispatcher.dispatch("stats", ()))[0].split("\n")
+    assert lines[0].split()[:2] == ["Command", "Calls"] and lines[1].split()[:2] == ["add", "1"]
+    print("All dispatcher tests passed.")
+
+def test_server():
+    async def scenario():
+        contacts = {}
+        with tempfile.TemporaryDirectory() as temp_dir:
+            address = os.path.join(temp_dir, "bot.sock")
+            server = await serve(contacts, address)
+            async with server:
+                reader, writer = await open_connection(address)
+                assert await reader.readuntil(b"\n\n") == b"Welcome to the assistant bot!\n\n"
+                writer.write(b"add John 123456\nphone John\nadd John\nclose\n")
+                responses = [await reader.readuntil(b"\n\n") for _ in range(4)]
+                assert responses == [b"Contact added.\n\n", b"123456\n\n", b"Invalid arguments.\n\n", b"Good bye!\n\n"]
+                writer.close()
+                # Test the concurrent sessions share the contacts
+                report = await load_test(address, clients=20, requests=9)
+                assert report.commands == 180 and report.percentile(0.99) > 0, "All commands are answered"
+                assert len(contacts) == 1 + 20 * 3, "Every client adds its contacts"
+                assert contacts["client3_0"] == "1" and contacts["client3_2"] == "7", "Changes are applied"
+                # Test a streamed table larger than one block comes whole, followed by the next response
+                contacts.update((f"User{i:05}", str(i)) for i in range(OUTPUT_BLOCK_SIZE + 100))
+                reader, writer = await open_connection(address)
+                await reader.readuntil(b"\n\n")
+                writer.write(b"all stream\nphone User00007\n")
+                table = []
+                while (line := await reader.readline()) != b"\n":
+                    table.append(line)
+                assert len(table) == len(contacts) + 1 and await reader.readuntil(b"\n\n") == b"7\n\n"
+                writer.write(b"close\n")
+                assert await reader.read() == b"Good bye!\n\n", "The server closes the session"
+                writer.close()
+
+    class FailingContacts(dict):
+        def __setitem__(self, name, phone):
+            raise OSError("The storage is read-only")
+
+    async def failing_scenario():
+        with tempfile.TemporaryDirectory() as temp_dir:
+            address = os.path.join(temp_dir, "bot.sock")
+            server = await serve(FailingContacts(), address)
+            async with server:
+                reader, writer = await open_connection(address)
+                await reader.readuntil(b"\n\n")
+                writer.write(b"add John 123456\nall\n")
+                with patch("sys.stderr", new_callable=StringIO) as log:
+                    responses = [await reader.readuntil(b"\n\n") for _ in range(2)]
+                assert responses == [b"Command failed.\n\n", b"{}\n\n"], "The session goes on after a failure"
+                assert "The storage is read-only" in log.getvalue(), "The failure is logged"
+                writer.write(b"close\n")
+                assert await reader.read() == b"Good bye!\n\n"
+                writer.close()
+
+    asyncio.run(scenario())
+    asyncio.run(failing_scenario())
+    print("All server mode tests passed.")
+
+def test_contact_search():
+    contacts = open_contacts()
+    for name in ("John", "Johanna", "jo", "Alice", "Alicia", "Bob"):
+        add_contact((name, f"{len(name)}"), contacts)
+    assert find_contacts(("jo",), contacts) == [format_contact(name, str(len(name))) for name in ("jo", "Johanna", "John")]
+    assert fuzzy_contacts(("alise",), contacts) == [format_contact("Alice", "5")]
+    assert fuzzy_contacts(("alicja",), contacts) == [format_contact("Alicia", "6")]
+    assert find_contacts(("x",), contacts) == fuzzy_contacts(("Xavier",), contacts) == ["Contact not found."]
+    # Test the built index follows add and change
+    add_contact(("Johanne", "7"), contacts)
+    change_contact(("Johanne", "77"), contacts)
+    assert contacts.index.prefix("jo") == ["jo", "Johanna", "Johanne", "John"]
+    assert contacts.index.fuzzy("johanne") == (["Johanne", "Johanna"], 2), "Closest match comes first"
+    del contacts["Johanna"]
+    assert contacts.index.prefix("joha") == contacts.index.fuzzy("johanne").names == ["Johanne"]
+    # Test a plain dictionary is searched too
+    assert find_contacts(("B",), {"Bob": "1"}) == [format_contact("Bob", "1")]
+    # Test the distance skips the common prefix and suffix and stops at the limit
+    assert edit_distance("kovalenko", "kovalenko", 2) == 0 and edit_distance("kovalenko", "kowalenko", 2) == 1
+    assert edit_distance("ab", "ba", 2) == 2 and edit_distance("abc", "", 2) == 3 and edit_distance("", "ab", 2) == 2
+    # Test the removed names are dropped once they outnumber the others
+    index = TrigramIndex()
+    for i in range(10):
+        index.add(f"Name{i}")
+    for i in range(5):
+        index.discard(f"Name{i}")
+    assert len(index.names) == 10 and index.removed == 5
+    index.discard("Name5")
+    assert index.names == [f"Name{i}" for i in range(6, 10)] and index.removed == 0, "Index compacted"
+    assert all(name_id < 4 for postings in index.postings.values() for name_id in postings)
+    assert index.search("name7", 2)[0][0] == (0, "Name7") and index.search("Name3", 0) == ([], 0)
+    # Test a search within the budget is exact and a search over it compares a bounded number of names
+    for names in (FUZZY_CANDIDATES // 2, 3 * FUZZY_CANDIDATES):
+        many = TrigramIndex()
+        for i in range(names):
+            many.add(f"Alex {i:04}")
+        found, exact = many.search("Alex 0l23", 2)
+        expected = sorted((edit_distance("alex 0l23", name.casefold(), 2), name) for name in many.ids)
+        assert (1, "Alex 0123") in found and exact == (2 if names < FUZZY_CANDIDATES else 1)
+        assert [match for match in found if match[0] <= exact] == [match for match in expected if match[0] <= exact]
+    assert len(found) < len([match for match in expected if match[0] <= 2]), "Exact to one edit only"
+    compared = []
+    with patch(f"{__name__}.FUZZY_POSTINGS", 2 * FUZZY_CANDIDATES), \
+         patch(f"{__name__}.edit_distance", lambda a, b, limit: compared.append(b) or 0):
+        found, exact = many.search("Alex 0000", 2)
+    assert exact < 2 and 0 < len(compared) <= FUZZY_CANDIDATES
+    many_contacts = IndexedContacts(dict.fromkeys(many.ids, "1"))
+    with patch(f"{__name__}.FUZZY_POSTINGS", 2 * FUZZY_CANDIDATES):
+        assert fuzzy_contacts(("Alex 0000",), many_contacts)[-1].startswith("Results may be incomplete")
+    print("All contact search tests passed.")
+
 # Uncomment the line below to run the tests
 # test_functions()
 # test_main()
+# test_sqlite_contacts()
+# test_contacts_pager()
+# test_run_batch()
+# test_dispatcher()
+# test_server()
+# test_contact_search()
+# benchmark_contact_search()
             
 if __name__ == "__main__":
-    main()
+    run()
@@ -54,13 +54,383 @@ import sys
 from pathlib import Path
 from colorama import Fore, Style
 from io import StringIO
+from unittest.mock import patch
 from pathlib import Path
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Callable, Dict, Iterable, Iterator, List, NamedTuple, Optional, TextIO, Tuple
+import argparse
+import heapq
+import itertools
+import json
+import os
 import tempfile
 import shutil
+import threading
+import time
+
+from goit_pycore_hw_metrics import add_metrics_argument, configure, metrics
 
 TEST_DATA_DIR = (Path(__file__).parent).joinpath("test_data")
+# Number of threads listing directories ahead of the printed one
+WALK_WORKERS = 8
+# Number of subdirectories of a directory listed ahead of the printed one
+PREFETCH_DIRS = 16
+# Number of lines the renderer writes at once
+RENDER_BLOCK_LINES = 4096
+# Format version of the snapshot cache file
+SNAPSHOT_VERSION = 3
+# A directory whose mtime is less than this many nanoseconds away from its listing may change
+# again within the same mtime, so its listing is racy: not trusted on the next run. An mtime
+# further in the future is not reached by the next changes, they set the mtime to the present
+SNAPSHOT_RACY_NS = 2_000_000_000
+# Default number of directories in the largest subtrees report
+TOP_DIRS = 10
+# Output formats of the command line, text is the colored tree
+FORMATS = ("text", "ndjson", "json")
+
+
+class TreeEntry(NamedTuple):
+    """
+    An entry of the directory tree, in printing order.
+    
+    Attributes:
+    - path (str): The path of the entry.
+    - name (str): The name of the entry.
+    - depth (int): 1 for the children of the root, 2 for their children and so on.
+    - is_dir (bool): True for a directory, False for a file.
+    - is_last (bool): True if the entry is the last child of its directory.
+    - hidden (int): For a summary entry, the number of entries of the directory left out, 0 otherwise.
+    - size (Optional[int]): Size in bytes of a file, or total size of the files below a directory,
+      None if the entries were not stat'ed.
+    - files (int): Number of files below a directory, in the sizes mode.
+    - mtime (Optional[float]): Modification time in seconds, None if the entries were not stat'ed.
+    """
+    path: str
+    name: str
+    depth: int
+    is_dir: bool
+    is_last: bool
+    hidden: int = 0
+    size: Optional[int] = None
+    files: int = 0
+    mtime: Optional[float] = None
+
+
+def scan_dir(path: str, limit: Optional[int] = None,
+             stat: bool = False) -> Tuple[List[os.DirEntry], List[os.DirEntry], int]:
+    """
+    Lists a directory once with os.scandir, telling directories from files by the entry type
+    cached by scandir, so no stat call is needed unless the entry is a symlink.
+    
+    Parameters:
+    - path (str): The directory to list.
+    - limit (Optional[int]): The largest number of entries to keep, directories first, not negative.
+      Only about twice as many entries are held in memory while listing.
+    - stat (bool): True to stat the entries while listing, the result is cached by each os.DirEntry.
+    
+    Returns:
+    - Tuple[List[os.DirEntry], List[os.DirEntry], int]: The subdirectories and the files, each sorted
+      by name, and the number of entries left out. All are empty if the path is not a readable directory.
+    """
+    if limit is not None and limit < 0:
+        raise ValueError(f"The limit of entries must not be negative, got {limit}")
+    directories = []
+    files = []
+    total = 0
+    by_name = lambda entry: entry.name
+    # the type of an entry comes from the listing, is_dir stats only the symlinks
+    counting = metrics.enabled
+    symlinks = 0
+    try:
+        with os.scandir(path) as entries:
+            for entry in entries:
+                if counting and entry.is_symlink():
+                    symlinks += 1
+                if entry.is_dir():
+                    directories.append(entry)
+                elif entry.is_file():
+                    files.append(entry)
+                else:
+                    continue
+                total += 1
+                # keep the first entries by name only
+                if limit is not None and len(directories) + len(files) > 2 * limit + 1:
+                    directories.sort(key=by_name)
+                    del directories[limit:]
+                    files.sort(key=by_name)
+                    del files[limit - len(directories):]
+    except OSError:
+        return [], [], 0
+    if counting:
+        metrics.count("tree.scandir")
+        metrics.count("tree.stat_avoided", total - symlinks)
+        metrics.count("tree.stat", symlinks + (len(directories) + len(files) if stat else 0))
+    directories.sort(key=by_name)
+    files.sort(key=by_name)
+    if limit is not None:
+        del directories[limit:]
+        del files[limit - len(directories):]
+    if stat:
+        for entry in directories + files:
+            try:
+                entry.stat(follow_symlinks=False)
+            except OSError:
+                pass
+    return directories, files, total - len(directories) - len(files)
+
+def stat_scan_dir(path: str, limit: Optional[int] = None) -> Tuple[List[os.DirEntry], List[os.DirEntry], int]:
+    """
+    Lists a directory with scan_dir, stat'ing the entries in the listing thread.
+    """
+    return scan_dir(path, limit, stat=True)
+
+def entry_stat(entry: os.DirEntry) -> Optional[os.stat_result]:
+    """
+    Returns the stat result cached by a listed entry, None if it can not be stat'ed.
+    """
+    try:
+        return entry.stat(follow_symlinks=False)
+    except OSError:
+        return None
 
-def print_dir_tree(path: Path, prefix: str = ''):
+
+class CachedEntry(NamedTuple):
+    """
+    An entry of a directory listing restored from a TreeSnapshot, with the os.DirEntry
+    attributes used by walk_tree.
+    """
+    path: str
+    name: str
+    symlink: bool = False
+
+    def is_symlink(self) -> bool:
+        return self.symlink
+
+
+# A listing function: (path, limit) -> (directories, files, hidden)
+Lister = Callable[[str, Optional[int]], Tuple[list, list, int]]
+
+
+class TreeSnapshot:
+    """
+    On-disk cache of directory listings: the mtime and the sorted children names of each directory.
+    A directory whose mtime has not changed is listed from the cache at the cost of one stat call,
+    the others are scanned again and their cache entries replaced. A racy listing, taken too close
+    to the mtime, is scanned again as well. The cache file is JSON, a file that is not a valid
+    snapshot is ignored.
+    """
+
+    def __init__(self, path: Optional[str] = None):
+        """
+        Parameters:
+        - path (Optional[str]): The cache file, loaded if it exists, None for an in-memory cache.
+        """
+        self.path = path
+        # directory -> (mtime_ns, racy, directory names, file names, names of the symlinked directories)
+        self.listings: Dict[str, Tuple[int, bool, List[str], List[str], frozenset]] = {}
+        self.scanned = 0
+        self.cached = 0
+        # directories listed since the last prune
+        self.visited = set()
+        # the listing threads share the counters
+        self.lock = threading.Lock()
+        if path is not None:
+            self.listings = self._load(path)
+
+    @staticmethod
+    def _load(path: str) -> Dict[str, Tuple[int, bool, List[str], List[str], frozenset]]:
+        # any unreadable, foreign or malformed file gives an empty cache
+        try:
+            with open(path, 'r', encoding='utf-8') as file:
+                state = json.load(file)
+        except (OSError, ValueError, RecursionError):
+            return {}
+        if not isinstance(state, dict) or state.get("version") != SNAPSHOT_VERSION \
+                or not isinstance(state.get("listings"), dict):
+            return {}
+        listings = {}
+        for directory, listing in state["listings"].items():
+            if not (isinstance(listing, list) and len(listing) == 5 and type(listing[0]) is int
+                    and type(listing[1]) is bool
+                    and all(isinstance(names, list) and all(isinstance(name, str) for name in names)
+                            for names in listing[2:])):
+                return {}
+            mtime, racy, directory_names, file_names, symlinks = listing
+            listings[directory] = (mtime, racy, directory_names, file_names, frozenset(symlinks))
+        return listings
+
+    def save(self):
+        """
+        Writes the cache file.
+        """
+        if self.path is None:
+            return
+        listings = {path: [mtime, racy, directory_names, file_names, sorted(symlinks)]
+                    for path, (mtime, racy, directory_names, file_names, symlinks) in self.listings.items()}
+        temp = f"{self.path}.tmp"
+        with open(temp, 'w', encoding='utf-8') as file:
+            json.dump({"version": SNAPSHOT_VERSION, "listings": listings}, file)
+        os.replace(temp, self.path)
+
+    def scan(self, path: str, limit: Optional[int] = None) -> Tuple[List[CachedEntry], List[CachedEntry], int]:
+        """
+        Lists a directory from the cache if its mtime has not changed and its listing is not racy,
+        with scan_dir otherwise.
+        
+        Parameters:
+        - path (str): The directory to list.
+        - limit (Optional[int]): The largest number of entries to return, directories first.
+        
+        Returns:
+        - Tuple[List[CachedEntry], List[CachedEntry], int]: The subdirectories and the files, each sorted
+          by name, and the number of entries left out.
+        """
+        try:
+            mtime = os.stat(path).st_mtime_ns
+        except OSError:
+            self.listings.pop(path, None)
+            return [], [], 0
+        listing = self.listings.get(path)
+        cached = listing is not None and listing[0] == mtime and not listing[1]
+        with self.lock:
+            self.visited.add(path)
+            if cached:
+                self.cached += 1
+            else:
+                self.scanned += 1
+        if cached:
+            metrics.count("tree.scandir_avoided")
+        else:
+            listing = self._list(path, mtime)
+            self.listings[path] = listing
+        _, _, directory_names, file_names, symlinks = listing
+        total = len(directory_names) + len(file_names)
+        if limit is not None:
+            directory_names = directory_names[:limit]
+            file_names = file_names[:limit - len(directory_names)]
+        directories = [CachedEntry(os.path.join(path, name), name, name in symlinks) for name in directory_names]
+        files = [CachedEntry(os.path.join(path, name), name) for name in file_names]
+        return directories, files, total - len(directories) - len(files)
+
+    @staticmethod
+    def _list(path: str, mtime: int) -> Tuple[int, bool, List[str], List[str], frozenset]:
+        started = time.time_ns()
+        directories, files, _ = scan_dir(path)
+        racy = abs(started - mtime) <= SNAPSHOT_RACY_NS
+        return (mtime, racy, [entry.name for entry in directories], [entry.name for entry in files],
+                frozenset(entry.name for entry in directories if entry.is_symlink()))
+
+    def changed(self) -> List[str]:
+        """
+        Returns the cached directories whose mtime has changed, or that are gone. A racy listing
+        with an unchanged mtime is listed again, and returned only if its names have changed.
+        """
+        changed = []
+        for path, listing in list(self.listings.items()):
+            try:
+                mtime = os.stat(path).st_mtime_ns
+                if mtime != listing[0]:
+                    changed.append(path)
+                elif listing[1]:
+                    relisted = self._list(path, mtime)
+                    self.listings[path] = relisted
+                    if relisted[2:] != listing[2:]:
+                        changed.append(path)
+            except OSError:
+                changed.append(path)
+        return changed
+
+    def prune(self):
+        """
+        Drops the listings of the directories not listed since the last prune, the directories
+        that are gone or no longer part of the rendered tree, so they are not polled or saved again.
+        """
+        with self.lock:
+            self.listings = {path: self.listings[path] for path in self.visited if path in self.listings}
+            self.visited = set()
+
+
+class _Frame:
+    """
+    A directory being printed: its listing, the position of the next entry and the pending
+    listings of its subdirectories.
+    """
+    __slots__ = ("directories", "entries", "hidden", "position", "depth", "listings")
+
+    def __init__(self, listing: Tuple[List[os.DirEntry], List[os.DirEntry], int], depth: int):
+        self.directories, files, self.hidden = listing
+        self.entries = self.directories + files
+        self.position = 0
+        self.depth = depth
+        self.listings: Dict[int, Future] = {}
+        metrics.count("tree.entries", len(self.entries))
+
+    def prefetch(self, pool: ThreadPoolExecutor, max_depth: Optional[int], limit: Optional[int], lister: Lister):
+        """
+        Submits the listings of the next PREFETCH_DIRS subdirectories, symlinks are not followed
+        and the subdirectories at max_depth are not listed.
+        """
+        if max_depth is not None and self.depth >= max_depth:
+            return
+        for i in range(self.position, min(self.position + PREFETCH_DIRS, len(self.directories))):
+            if i not in self.listings and not self.directories[i].is_symlink():
+                self.listings[i] = pool.submit(lister, self.directories[i].path, limit)
+
+
+def walk_tree(path: Path, workers: int = WALK_WORKERS, max_depth: Optional[int] = None,
+              max_entries: Optional[int] = None, lister: Lister = scan_dir,
+              stat: bool = False) -> Iterator[TreeEntry]:
+    """
+    Walks the directory tree without recursion, yielding directories first and files last
+    in each directory, sorted by name. The listings of the next subdirectories are done
+    ahead by a pool of threads while the entries are yielded in a deterministic order.
+    Directories reached through a symlink are yielded but not entered, to avoid cycles.
+    
+    Parameters:
+    - path (Path): The root directory.
+    - workers (int): Number of threads listing directories.
+    - max_depth (Optional[int]): The deepest level to yield, 1 for the children of the root only.
+    - max_entries (Optional[int]): The largest number of entries to yield per directory, the rest
+      of a directory is counted in a summary entry.
+    - lister (Lister): The function listing a directory, scan_dir or TreeSnapshot.scan.
+    - stat (bool): True to yield the sizes of the files and the modification times,
+      the directories are then listed with stat_scan_dir.
+    
+    Returns:
+    - Iterator[TreeEntry]: The entries of the tree below the root, in printing order.
+    """
+    if max_depth is not None and max_depth < 1:
+        return
+    if stat:
+        lister = stat_scan_dir
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        stack = [_Frame(lister(os.fspath(path), max_entries), 1)]
+        while stack:
+            frame = stack[-1]
+            if frame.position == len(frame.entries):
+                stack.pop()
+                if frame.hidden:
+                    yield TreeEntry('', '', frame.depth, False, True, frame.hidden)
+                continue
+            frame.prefetch(pool, max_depth, max_entries, lister)
+            i = frame.position
+            entry = frame.entries[i]
+            frame.position += 1
+            is_dir = i < len(frame.directories)
+            is_last = frame.position == len(frame.entries) and not frame.hidden
+            size = mtime = None
+            if stat:
+                result = entry_stat(entry)
+                if not is_dir:
+                    size = result.st_size if result else 0
+                mtime = result.st_mtime if result else None
+            yield TreeEntry(entry.path, entry.name, frame.depth, is_dir, is_last, size=size, mtime=mtime)
+            listing = frame.listings.pop(i, None)
+            if listing is not None:
+                stack.append(_Frame(listing.result(), frame.depth + 1))
+
+
+def print_dir_tree(path: Path, prefix: str = '', workers: int = WALK_WORKERS):
     """
     Prints the directory tree starting from the given path, displaying directories first and files last,
     with branches, including the parent directory.
@@ -68,31 +438,380 @@ def print_dir_tree(path: Path, prefix: str = ''):
     Parameters:
     - path (Path): The root directory or file to start the tree from.
     - prefix (str): The prefix to use for indentation and branches.
+    - workers (int): Number of threads listing directories.
     """
-    # Print the parent directory
+    render_tree(path, sys.stdout, prefix=prefix, workers=workers)
+
+def render_tree(path: Path, out: TextIO, color: bool = True, max_depth: Optional[int] = None,
+                max_entries: Optional[int] = None, prefix: str = '', workers: int = WALK_WORKERS,
+                snapshot: Optional[TreeSnapshot] = None):
+    """
+    Writes the directory tree to the stream as the tree is walked, in blocks of RENDER_BLOCK_LINES lines.
+    The root line is written before the walk starts. As the output is sorted, the first entry still waits
+    for one full listing of the root directory, but not for the rest of the tree.
+    
+    Parameters:
+    - path (Path): The root directory or file to start the tree from.
+    - out (TextIO): The stream to write to.
+    - color (bool): False to write the tree without colorama escape sequences.
+    - max_depth (Optional[int]): The deepest level to show, 1 for the children of the root only.
+    - max_entries (Optional[int]): The largest number of entries to show per directory,
+      followed by a "… N more" line.
+    - prefix (str): The prefix to use for indentation and branches.
+    - workers (int): Number of threads listing directories.
+    - snapshot (Optional[TreeSnapshot]): The cache of the directory listings, none by default.
+    """
+    lister = scan_dir if snapshot is None else snapshot.scan
+    entries = walk_tree(path, workers, max_depth, max_entries, lister)
+    write_tree(f'📦 {path.name}', entries, out, color, prefix)
+    if snapshot is not None:
+        snapshot.prune()
+
+@metrics.timed("tree")
+def write_tree(root: str, entries: Iterable[TreeEntry], out: TextIO, color: bool = True, prefix: str = ''):
+    """
+    Writes the root line and the entries with branches to the stream, in blocks of RENDER_BLOCK_LINES lines.
+    The sizes are shown for the entries that have one.
+    
+    Parameters:
+    - root (str): The root line.
+    - entries (Iterable[TreeEntry]): The entries in printing order.
+    - out (TextIO): The stream to write to.
+    - color (bool): False to write the tree without colorama escape sequences.
+    - prefix (str): The prefix to use for indentation and branches, the root line is written only if empty.
+    """
+    # Escape sequences are looked up once, not per line
+    directory, file, reset = (Fore.BLUE, Fore.GREEN, Style.RESET_ALL) if color else ('', '', '')
+    lines = []
+    # Print the parent directory before the first entry is asked for, the entries may be listed lazily
     if prefix == '':  # This ensures the parent directory is printed only once
-        print(Fore.BLUE + f'📦 {path.name}' + Style.RESET_ALL)
+        out.write(f'{directory}{root}{reset}\n')
+        out.flush()
+    # Write the first entry right away, then the whole blocks
+    block = 1
+    # branches[i] is the prefix of the entries at depth i + 1
+    branches = [prefix]
+    for entry in entries:
+        del branches[entry.depth:]
+        branch = branches[-1]
+        connector = "└── " if entry.is_last else "├── "
+        if entry.hidden:
+            lines.append(f'{file}{branch}{connector}… {entry.hidden} more{reset}\n')
+        elif entry.is_dir:
+            # Directory in blue
+            size = '' if entry.size is None else f' ({human_size(entry.size)}, {entry.files} files)'
+            lines.append(f'{directory}{branch}{connector}📂 {entry.name}{size}{reset}\n')
+            # Prepare new prefix for the next level, depending on whether the item is the last
+            branches.append(branch + ("    " if entry.is_last else "│   "))
+        else:
+            # File in green
+            size = '' if entry.size is None else f' ({human_size(entry.size)})'
+            lines.append(f'{file}{branch}{connector}📜 {entry.name}{size}{reset}\n')
+        if len(lines) >= block:
+            out.write(''.join(lines))
+            out.flush()
+            lines.clear()
+            block = RENDER_BLOCK_LINES
+    out.write(''.join(lines))
+    out.flush()
+
+def human_size(size: int) -> str:
+    """
+    Formats a number of bytes with a binary unit, 1.5 KiB for 1536.
+    """
+    for unit in ("B", "KiB", "MiB", "GiB", "TiB"):
+        if size < 1024 or unit == "TiB":
+            return f"{size} {unit}" if unit == "B" else f"{size:.1f} {unit}"
+        size /= 1024
+
+
+class SizeNode:
+    """
+    A directory of the sizes mode with the total size and number of the files below it,
+    the subdirectories and files kept for printing and the number of its entries.
+    The root also holds the largest directories of the tree.
+    """
+    __slots__ = ("path", "name", "mtime", "size", "files", "entries", "directories", "file_entries", "largest")
+
+    def __init__(self, path: str, name: str, mtime: Optional[float] = None):
+        self.path = path
+        self.name = name
+        self.mtime = mtime
+        self.size = 0
+        self.files = 0
+        self.entries = 0
+        self.directories: list = []
+        self.file_entries: list = []
+        self.largest: List["SizeNode"] = []
+
+
+@metrics.timed("tree")
+def build_size_tree(path: Path, workers: int = WALK_WORKERS, max_depth: Optional[int] = None,
+                    max_entries: Optional[int] = None, sort: str = "name", top: int = 0) -> SizeNode:
+    """
+    Walks the tree once, stat'ing the files in the listing threads, and adds up the sizes
+    and numbers of files of each directory when the walk leaves it (post-order).
+    Only the entries iter_size_tree shows with the same max_depth, max_entries and sort are kept:
+    the entries within max_depth and, per directory, the first max_entries directories and files
+    by the sort, chosen with bounded heaps for the size order. The other entries are added to
+    the totals only, so the memory does not grow with the size of the tree.
     
-    items = list(path.iterdir()) if path.is_dir() else []
-    directories = [item for item in items if item.is_dir()]
-    files = [item for item in items if item.is_file()]
+    Parameters:
+    - path (Path): The root directory.
+    - workers (int): Number of threads listing directories.
+    - max_depth (Optional[int]): The deepest level to keep, 1 for the children of the root only.
+    - max_entries (Optional[int]): The largest number of entries to keep per directory.
+    - sort (str): "name" or "size", the order choosing the entries kept per directory.
+    - top (int): Number of the largest directories of the whole tree kept in the largest list of the root.
+    
+    Returns:
+    - SizeNode: The root with the totals of the whole tree.
+    """
+    root = SizeNode(os.fspath(path), path.name)
+    # stack[i] is the open directory at depth i
+    stack = [root]
+    # heap of (size, -order, node) of the largest directories closed so far
+    largest = []
+    order = itertools.count()
 
-    # Continue with the existing logic to print directories and files
-    items_sorted = directories + files  # Directories first, then files
+    def keep(kept: list, item, size: int, before: int = 0):
+        # keeps the first max_entries items of a directory, counting the kept ones before them
+        if max_entries is None or (sort != "size" and len(kept) + before < max_entries):
+            kept.append(item)
+        elif sort == "size" and max_entries > 0:
+            # the earlier of two items of the same size stays, as in a stable sort
+            heapq.heappush(kept, (size, -next(order), item))
+            if len(kept) > max_entries:
+                heapq.heappop(kept)
 
-    for i, item in enumerate(items_sorted):
-        is_last = i == len(items_sorted) - 1  # Check if the item is the last in the list
-        connector = "└── " if is_last else "├── "
-        if item.is_dir():
-            # Print directory with a blue color
-            print(Fore.BLUE + prefix + connector + f'📂 {item.name}' + Style.RESET_ALL)
-            # Prepare new prefix for the next level, depending on whether the item is the last
-            new_prefix = prefix + ("    " if is_last else "│   ")
-            print_dir_tree(item, new_prefix)
+    def close(node: SizeNode):
+        # the kept entries back in name order, the node in the largest directories
+        if sort == "size" and max_entries is not None:
+            node.directories = [item for _, _, item in sorted(node.directories, key=lambda kept: -kept[1])]
+            # the directories come first, the largest files fill the rest
+            files = heapq.nlargest(max_entries - len(node.directories), node.file_entries)
+            node.file_entries = [item for _, _, item in sorted(files, key=lambda kept: -kept[1])]
+        if top and node is not root:
+            heapq.heappush(largest, (node.size, -next(order), node))
+            if len(largest) > top:
+                heapq.heappop(largest)
+
+    def leave(depth: int):
+        # close the directories deeper than depth, adding their totals to their parents
+        while len(stack) > depth:
+            node = stack.pop()
+            close(node)
+            parent = stack[-1]
+            parent.size += node.size
+            parent.files += node.files
+            if max_depth is None or len(stack) <= max_depth:
+                keep(parent.directories, node, node.size)
+
+    for entry in walk_tree(path, workers, stat=True):
+        leave(entry.depth)
+        parent = stack[-1]
+        parent.entries += 1
+        if entry.is_dir:
+            stack.append(SizeNode(entry.path, entry.name, entry.mtime))
         else:
-            # Print file with a green color
-            print(Fore.GREEN + prefix + connector + f'📜 {item.name}' + Style.RESET_ALL)
-            
+            parent.size += entry.size
+            parent.files += 1
+            if max_depth is None or entry.depth <= max_depth:
+                keep(parent.file_entries, entry, entry.size, len(parent.directories))
+    leave(1)
+    close(root)
+    root.largest = [node for _, _, node in sorted(largest, reverse=True)]
+    return root
+
+def iter_size_tree(root: SizeNode, sort: str = "name", max_depth: Optional[int] = None,
+                   max_entries: Optional[int] = None) -> Iterator[TreeEntry]:
+    """
+    Yields the entries of a size tree in printing order, directories first and files last.
+    A tree built with limits holds the kept entries only, it is iterated with the same limits.
+    
+    Parameters:
+    - root (SizeNode): The root of the size tree.
+    - sort (str): "name" to sort the entries by name, "size" to sort them by decreasing size.
+    - max_depth (Optional[int]): The deepest level to yield, 1 for the children of the root only.
+    - max_entries (Optional[int]): The largest number of entries to yield per directory.
+    
+    Returns:
+    - Iterator[TreeEntry]: The entries with their sizes.
+    """
+    def children(node: SizeNode, depth: int) -> Iterator[TreeEntry]:
+        directories = node.directories
+        files = node.file_entries
+        if sort == "size":
+            directories = sorted(directories, key=lambda child: -child.size)
+            files = sorted(files, key=lambda entry: -entry.size)
+        entries = [TreeEntry(child.path, child.name, depth, True, False, size=child.size, files=child.files,
+                             mtime=child.mtime) for child in directories] + [entry._replace(depth=depth, is_last=False) for entry in files]
+        if max_entries is not None:
+            del entries[max_entries:]
+        hidden = node.entries - len(entries)
+        for i, entry in enumerate(entries):
+            node = directories[i] if i < len(directories) else None
+            yield entry._replace(is_last=i == len(entries) - 1 and not hidden), node
+        if hidden:
+            yield TreeEntry('', '', depth, False, True, hidden), None
+
+    if max_depth is not None and max_depth < 1:
+        return
+    stack = [children(root, 1)]
+    while stack:
+        item = next(stack[-1], None)
+        if item is None:
+            stack.pop()
+            continue
+        entry, node = item
+        yield entry
+        if node is not None and (max_depth is None or entry.depth < max_depth):
+            stack.append(children(node, entry.depth + 1))
+
+def render_size_tree(path: Path, out: TextIO, color: bool = True, max_depth: Optional[int] = None,
+                     max_entries: Optional[int] = None, sort: str = "name", top: int = 0,
+                     workers: int = WALK_WORKERS):
+    """
+    Writes the directory tree with the total size and number of files of each directory,
+    followed by the report of the largest subtrees.
+    
+    Parameters:
+    - path (Path): The root directory.
+    - out (TextIO): The stream to write to.
+    - color (bool): False to write the tree without colorama escape sequences.
+    - max_depth (Optional[int]): The deepest level to show, 1 for the children of the root only.
+    - max_entries (Optional[int]): The largest number of entries to show per directory.
+    - sort (str): "name" to sort the entries by name, "size" to sort them by decreasing size.
+    - top (int): Number of directories in the largest subtrees report, none if 0.
+    - workers (int): Number of threads listing directories.
+    """
+    root = build_size_tree(path, workers, max_depth, max_entries, sort, top)
+    entries = iter_size_tree(root, sort, max_depth, max_entries)
+    write_tree(f'📦 {root.name} ({human_size(root.size)}, {root.files} files)', entries, out, color)
+    if top:
+        out.write("Largest directories:\n")
+        for node in root.largest:
+            out.write(f"{human_size(node.size):>12} {node.files:>10} files  {node.path}\n")
+        out.flush()
+
+def entry_record(entry: TreeEntry) -> dict:
+    """
+    Returns the JSON record of an entry: path, depth, type, size and mtime.
+    A summary entry is a record of type "more" with the number of entries left out.
+    """
+    if entry.hidden:
+        return {"depth": entry.depth, "type": "more", "count": entry.hidden}
+    record = {"path": entry.path, "depth": entry.depth, "type": "dir" if entry.is_dir else "file",
+              "size": entry.size, "mtime": entry.mtime}
+    if entry.is_dir and entry.size is not None:
+        record["files"] = entry.files
+    return record
+
+@metrics.timed("tree")
+def write_records(entries: Iterable[TreeEntry], out: TextIO, fmt: str = "ndjson"):
+    """
+    Writes the entries as JSON while they are walked, in blocks of RENDER_BLOCK_LINES records,
+    so the whole tree is never held in memory.
+    
+    Parameters:
+    - entries (Iterable[TreeEntry]): The entries in printing order.
+    - out (TextIO): The stream to write to.
+    - fmt (str): "ndjson" for one record per line, "json" for a compact JSON array.
+    """
+    encode = json.JSONEncoder(separators=(',', ':'), ensure_ascii=False).encode
+    separator = '\n' if fmt == "ndjson" else ','
+    records = []
+    first = True
+    if fmt == "json":
+        out.write('[')
+    for entry in entries:
+        records.append(encode(entry_record(entry)))
+        if len(records) >= RENDER_BLOCK_LINES:
+            out.write(('' if first else separator) + separator.join(records))
+            first = False
+            records.clear()
+    if records:
+        out.write(('' if first else separator) + separator.join(records))
+        first = False
+    if fmt == "json":
+        out.write(']\n')
+    elif not first:
+        out.write('\n')
+    out.flush()
+
+def export_tree(path: Path, out: TextIO, fmt: str = "ndjson", max_depth: Optional[int] = None,
+                max_entries: Optional[int] = None, workers: int = WALK_WORKERS):
+    """
+    Writes the directory tree as JSON records with the sizes of the files and the modification times,
+    during a single walk.
+    
+    Parameters:
+    - path (Path): The root directory.
+    - out (TextIO): The stream to write to.
+    - fmt (str): "ndjson" for one record per line, "json" for a compact JSON array.
+    - max_depth (Optional[int]): The deepest level to write, 1 for the children of the root only.
+    - max_entries (Optional[int]): The largest number of entries to write per directory.
+    - workers (int): Number of threads listing directories.
+    """
+    write_records(walk_tree(path, workers, max_depth, max_entries, stat=True), out, fmt)
+
+def watch_tree(path: Path, out: TextIO, snapshot: TreeSnapshot, interval: float = 1.0,
+               rounds: Optional[int] = None, **options):
+    """
+    Renders the directory tree, then polls the mtimes of the listed directories and renders
+    the tree again when one of them changes, rescanning only the changed directories.
+    
+    Parameters:
+    - path (Path): The root directory.
+    - out (TextIO): The stream to write to.
+    - snapshot (TreeSnapshot): The cache of the directory listings.
+    - interval (float): Seconds between two polls.
+    - rounds (Optional[int]): Number of polls, until interrupted by default.
+    - options: The other arguments of render_tree.
+    """
+    render_tree(path, out, snapshot=snapshot, **options)
+    snapshot.save()
+    while rounds is None or rounds > 0:
+        time.sleep(interval)
+        if rounds is not None:
+            rounds -= 1
+        if snapshot.changed():
+            if out.isatty():
+                # clear the screen before the new tree
+                out.write("\033[2J\033[H")
+            render_tree(path, out, snapshot=snapshot, **options)
+            snapshot.save()
+
+def benchmark_snapshot(entries: int = 500_000, files_per_dir: int = 100):
+    """
+    Compares a cold scan with a warm re-scan through a TreeSnapshot of a generated tree.
+    
+    Parameters:
+    - entries (int): Number of entries of the generated tree.
+    - files_per_dir (int): Number of files in each generated directory.
+    """
+    temp_dir = Path(tempfile.mkdtemp())
+    directories = max(1, entries // (files_per_dir + 1))
+    for i in range(directories):
+        directory = temp_dir / f"d{i // 100}" / f"d{i}"
+        directory.mkdir(parents=True)
+        for j in range(files_per_dir):
+            (directory / f"f{j}").touch()
+    # make the listings old enough to be trusted
+    past = time.time() - 10
+    for directory, _, _ in os.walk(temp_dir):
+        os.utime(directory, (past, past))
+    cache = temp_dir.parent / f"{temp_dir.name}.snapshot"
+    for run in ("cold", "warm"):
+        snapshot = TreeSnapshot(os.fspath(cache))
+        with open(os.devnull, 'w', encoding='utf-8') as out:
+            started = time.perf_counter()
+            render_tree(temp_dir, out, color=False, snapshot=snapshot)
+            elapsed = time.perf_counter() - started
+        snapshot.save()
+        print(f"{run:<5} {elapsed:8.2f} s, {snapshot.scanned} directories scanned, {snapshot.cached} from the cache")
+    cache.unlink()
+    shutil.rmtree(temp_dir)
 
 # Test function with test cases
 
@@ -122,24 +841,318 @@ def test_print_dir_tree():
     
     print("All test cases passed successfully.")
             
-def main():
+def positive_int(value: str) -> int:
+    """
+    Converts a command line argument to an integer of at least 1.
+    """
+    number = int(value)
+    if number < 1:
+        raise argparse.ArgumentTypeError(f"expected a number of at least 1, got {value}")
+    return number
+
+def non_negative_int(value: str) -> int:
+    """
+    Converts a command line argument to an integer of at least 0.
+    """
+    number = int(value)
+    if number < 0:
+        raise argparse.ArgumentTypeError(f"expected a number of at least 0, got {value}")
+    return number
+
+def main(argv: Optional[List[str]] = None):
     """
     Main function that processes command line arguments and starts the directory tree printing.
+    
+    Parameters:
+    - argv (Optional[List[str]]): The command line arguments, sys.argv by default.
     """
-    # Check if exactly one argument (the directory path) is provided.
-    if len(sys.argv) != 2:
-        print("Usage: python hw03.py <directory>")
-        sys.exit(1)
-    path = Path(sys.argv[1])
+    parser = argparse.ArgumentParser(description="Prints the directory tree")
+    parser.add_argument("directory", help="The root of the tree")
+    parser.add_argument("--max-depth", type=non_negative_int, help="The deepest level to show, 1 for the children of the root only")
+    parser.add_argument("--max-entries-per-dir", type=non_negative_int, help="The largest number of entries to show per directory")
+    parser.add_argument("--no-color", action="store_true", help="Print without colors")
+    parser.add_argument("--workers", type=positive_int, default=WALK_WORKERS, help="Number of threads listing directories")
+    parser.add_argument("--cache", help="Snapshot file of the directory listings, reused by the next runs")
+    parser.add_argument("--watch", type=float, nargs="?", const=1.0, metavar="SECONDS",
+                        help="Render again whenever a directory changes, polling every SECONDS")
+    parser.add_argument("--sizes", action="store_true", help="Show the total size and number of files of each directory")
+    parser.add_argument("--sort", choices=["name", "size"], default="name", help="Order of the entries in the sizes mode")
+    parser.add_argument("--top", type=non_negative_int, nargs="?", const=TOP_DIRS, default=0, metavar="N",
+                        help="Report the N largest directories in the sizes mode")
+    parser.add_argument("--format", choices=FORMATS, default="text",
+                        help="Output format, ndjson and json write one record per entry")
+    add_metrics_argument(parser)
+    args = parser.parse_args(argv)
+    configure(args.metrics)
+    path = Path(args.directory)
     # Check if the provided path exists.
     if not path.exists():
         print(f"Error: {path} does not exist.")
         sys.exit(1)
     # Start printing the directory tree from the provided path.
-    print_dir_tree(path)
+    options = dict(color=not args.no_color, max_depth=args.max_depth, max_entries=args.max_entries_per_dir,
+                   workers=args.workers)
+    if args.format != "text":
+        if args.sizes:
+            root = build_size_tree(path, args.workers, args.max_depth, args.max_entries_per_dir, args.sort)
+            entries = iter_size_tree(root, args.sort, args.max_depth, args.max_entries_per_dir)
+            write_records(entries, sys.stdout, args.format)
+        else:
+            export_tree(path, sys.stdout, args.format, args.max_depth, args.max_entries_per_dir, args.workers)
+    elif args.sizes:
+        render_size_tree(path, sys.stdout, sort=args.sort, top=args.top, **options)
+    elif args.watch is not None:
+        try:
+            watch_tree(path, sys.stdout, TreeSnapshot(args.cache), args.watch, **options)
+        except KeyboardInterrupt:
+            pass
+    elif args.cache:
+        snapshot = TreeSnapshot(args.cache)
+        render_tree(path, sys.stdout, snapshot=snapshot, **options)
+        snapshot.save()
+    else:
+        render_tree(path, sys.stdout, **options)
     
+def test_walk_tree():
+    # Create a tree deeper than the recursion limit used below and a wide directory
+    temp_dir = Path(tempfile.mkdtemp())
+    deep = temp_dir / "deep" / "/".join(["d"] * 300)
+    deep.mkdir(parents=True)
+    (temp_dir / "wide").mkdir()
+    for i in range(50, 0, -1):
+        (temp_dir / "wide" / f"f{i:02}").touch()
+        (temp_dir / "wide" / f"d{i:02}").mkdir()
+    (temp_dir / "a.txt").touch()
+    (temp_dir / "link").symlink_to(temp_dir)
+    recursion_limit = sys.getrecursionlimit()
+    sys.setrecursionlimit(150)
+    try:
+        entries = list(walk_tree(temp_dir, workers=4))
+    finally:
+        sys.setrecursionlimit(recursion_limit)
+    # Directories first, then files, sorted by name
+    top = [(entry.name, entry.is_dir, entry.is_last) for entry in entries if entry.depth == 1]
+    assert top == [("deep", True, False), ("link", True, False), ("wide", True, False), ("a.txt", False, True)]
+    wide = [entry.name for entry in entries if Path(entry.path).parent.name == "wide"]
+    assert wide == [f"d{i:02}" for i in range(1, 51)] + [f"f{i:02}" for i in range(1, 51)]
+    # The deep tree is walked without recursion, the symlink is not entered
+    assert max(entry.depth for entry in entries) == 301
+    assert not any("link" in Path(entry.path).parts[len(temp_dir.parts):-1] for entry in entries)
+    shutil.rmtree(temp_dir)
+    print("All test cases passed successfully.")
+
+def test_render_tree():
+    temp_dir = Path(tempfile.mkdtemp())
+    for i in range(5):
+        (temp_dir / f"dir{i}" / "sub").mkdir(parents=True)
+        (temp_dir / f"dir{i}" / "sub" / "file.txt").touch()
+        (temp_dir / f"file{i}.txt").touch()
+    out = StringIO()
+    render_tree(temp_dir, out, color=False, max_depth=2, max_entries=3)
+    expected_output = f"""📦 {temp_dir.name}
+├── 📂 dir0
+│   └── 📂 sub
+├── 📂 dir1
+│   └── 📂 sub
+├── 📂 dir2
+│   └── 📂 sub
+└── … 7 more
+"""
+    assert out.getvalue() == expected_output, f"Expected output: \n{expected_output} \nnot equal to: \n{out.getvalue()}"
+    # The colored output differs by the escape sequences only
+    colored = StringIO()
+    render_tree(temp_dir, colored, max_depth=2, max_entries=3)
+    for sequence in (Fore.BLUE, Fore.GREEN, Style.RESET_ALL):
+        colored = StringIO(colored.getvalue().replace(sequence, ''))
+    assert colored.getvalue() == expected_output
+    # The root line is written before the first entry is listed
+    out = StringIO()
+
+    def entries() -> Iterator[TreeEntry]:
+        assert out.getvalue() == "root\n", "Root line written before the walk"
+        yield TreeEntry("file.txt", "file.txt", 1, False, True)
+
+    write_tree("root", entries(), out, color=False)
+    assert out.getvalue() == "root\n└── 📜 file.txt\n"
+    # The limits are checked, a limit of 0 shows the summary only
+    out = StringIO()
+    render_tree(temp_dir, out, color=False, max_depth=1, max_entries=0)
+    assert out.getvalue() == f"📦 {temp_dir.name}\n└── … 10 more\n"
+    try:
+        scan_dir(os.fspath(temp_dir), -1)
+        assert False, "Negative limit accepted"
+    except ValueError:
+        pass
+    for option in (["--workers", "0"], ["--max-entries-per-dir", "-1"], ["--max-depth", "x"]):
+        try:
+            with patch("sys.stderr", new_callable=StringIO) as errors:
+                main([os.fspath(temp_dir), *option])
+            assert False, f"Invalid {option} accepted"
+        except SystemExit as error:
+            assert error.code == 2 and option[0] in errors.getvalue()
+    shutil.rmtree(temp_dir)
+    print("All test cases passed successfully.")
+
+def test_tree_snapshot():
+    temp_dir = Path(tempfile.mkdtemp())
+    for i in range(3):
+        (temp_dir / f"dir{i}").mkdir()
+        (temp_dir / f"dir{i}" / "file.txt").touch()
+    past = time.time() - 10
+    for directory in [temp_dir] + list(temp_dir.iterdir()):
+        os.utime(directory, (past, past))
+    cache = os.fspath(temp_dir.parent / f"{temp_dir.name}.snapshot")
+    cold = StringIO()
+    snapshot = TreeSnapshot(cache)
+    render_tree(temp_dir, cold, color=False, snapshot=snapshot)
+    snapshot.save()
+    assert (snapshot.scanned, snapshot.cached) == (4, 0), "Cold run scans every directory"
+    # The warm run lists unchanged directories from the cache file
+    (temp_dir / "dir1" / "new.txt").touch()
+    os.utime(temp_dir / "dir1", (past + 1, past + 1))
+    warm = StringIO()
+    snapshot = TreeSnapshot(cache)
+    render_tree(temp_dir, warm, color=False, snapshot=snapshot)
+    assert (snapshot.scanned, snapshot.cached) == (1, 3), "Warm run scans the changed directory only"
+    assert warm.getvalue() == cold.getvalue().replace("dir1\n│   └── 📜 file.txt", "dir1\n│   ├── 📜 file.txt\n│   └── 📜 new.txt")
+    fresh = StringIO()
+    render_tree(temp_dir, fresh, color=False)
+    assert warm.getvalue() == fresh.getvalue(), "Cached tree equals a fresh scan"
+    # A recently modified directory is scanned again on the next run
+    dir2 = os.fspath(temp_dir / "dir2")
+    (temp_dir / "dir2" / "newer.txt").touch()
+    snapshot.scan(dir2)
+    assert snapshot.listings[dir2][1], "Recent listing is racy"
+    scanned = snapshot.scanned
+    snapshot.scan(dir2)
+    assert snapshot.scanned == scanned + 1, "Racy listing scanned again"
+    assert snapshot.changed() == [], "Racy listing with the same names is not a change"
+    # A change within the same mtime is found by listing the racy directory again
+    mtime = os.stat(dir2).st_mtime_ns
+    (temp_dir / "dir2" / "newest.txt").touch()
+    os.utime(dir2, ns=(mtime, mtime))
+    assert snapshot.changed() == [dir2]
+    assert "newest.txt" in snapshot.listings[dir2][3] and snapshot.changed() == []
+    # A listing of a directory with an mtime far in the future is trusted
+    future = time.time() + 3600
+    os.utime(dir2, (future, future))
+    snapshot.scan(dir2)
+    assert not snapshot.listings[dir2][1], "Future mtime beyond the racy bound"
+    os.utime(dir2, (past, past))
+    # The watch mode renders again after a change only
+    out = StringIO()
+    watch_tree(temp_dir, out, TreeSnapshot(), interval=0.01, rounds=2, color=False)
+    assert out.getvalue().count("📦") == 1, "No render without a change"
+    out = StringIO()
+    with patch("time.sleep", side_effect=lambda _: (temp_dir / "dir1" / "watched.txt").touch()):
+        watch_tree(temp_dir, out, TreeSnapshot(), interval=0.01, rounds=1, color=False)
+    assert out.getvalue().count("📦") == 2 and "watched.txt" in out.getvalue()
+    # A deleted directory is reported once, then dropped by the next render
+    for directory in [temp_dir] + list(temp_dir.iterdir()):
+        os.utime(directory, (past, past))
+    snapshot = TreeSnapshot(cache)
+    render_tree(temp_dir, StringIO(), color=False, snapshot=snapshot)
+    shutil.rmtree(temp_dir / "dir0")
+    assert os.fspath(temp_dir / "dir0") in snapshot.changed()
+    render_tree(temp_dir, StringIO(), color=False, snapshot=snapshot)
+    snapshot.save()
+    assert os.fspath(temp_dir / "dir0") not in snapshot.changed(), "Deleted directory polled again"
+    assert os.fspath(temp_dir / "dir0") not in TreeSnapshot(cache).listings, "Deleted directory saved"
+    # A cache file that is not a valid snapshot is ignored
+    for content in (b"\x80\x05]\x94.", b"[]", b'{"version": 3, "listings": {"a": [0, false, [1], [], []]}}', b'{"version": 3, "listings": {"a": [0, 0, [], [], []]}}', b"\xff"):
+        with open(cache, 'wb') as file:
+            file.write(content)
+        assert TreeSnapshot(cache).listings == {}, f"Invalid cache file {content!r}"
+    os.unlink(cache)
+    shutil.rmtree(temp_dir)
+    print("All test cases passed successfully.")
+
+def test_render_size_tree():
+    temp_dir = Path(tempfile.mkdtemp())
+    (temp_dir / "small").mkdir()
+    (temp_dir / "small" / "a.txt").write_bytes(b"x" * 10)
+    (temp_dir / "big" / "inner").mkdir(parents=True)
+    (temp_dir / "big" / "inner" / "b.bin").write_bytes(b"x" * 3000)
+    (temp_dir / "big" / "c.bin").write_bytes(b"x" * 100)
+    (temp_dir / "top.txt").write_bytes(b"x" * 5)
+    root = build_size_tree(temp_dir, top=2)
+    assert (root.size, root.files) == (3115, 4), "Totals of the whole tree"
+    assert [(node.name, node.size, node.files) for node in root.largest] == [("big", 3100, 2), ("inner", 3000, 1)]
+    out = StringIO()
+    render_size_tree(temp_dir, out, color=False, sort="size", top=1)
+    expected_output = f"""📦 {temp_dir.name} (3.0 KiB, 4 files)
+├── 📂 big (3.0 KiB, 2 files)
+│   ├── 📂 inner (2.9 KiB, 1 files)
+│   │   └── 📜 b.bin (2.9 KiB)
+│   └── 📜 c.bin (100 B)
+├── 📂 small (10 B, 1 files)
+│   └── 📜 a.txt (10 B)
+└── 📜 top.txt (5 B)
+Largest directories:
+     3.0 KiB          2 files  {temp_dir / "big"}
+"""
+    assert out.getvalue() == expected_output, f"Expected output: \n{expected_output} \nnot equal to: \n{out.getvalue()}"
+    # Limits and name order
+    out = StringIO()
+    write_tree("root", iter_size_tree(root, max_depth=1, max_entries=1), out, color=False)
+    assert out.getvalue() == "root\n├── 📂 big (3.0 KiB, 2 files)\n└── … 2 more\n"
+    # A tree built with the limits keeps the shown entries only and prints the same
+    for sort, max_depth, max_entries in (("name", 1, 1), ("size", 2, 1), ("size", None, 2), ("name", 2, 0)):
+        full = StringIO()
+        write_tree("root", iter_size_tree(root, sort, max_depth, max_entries), full, color=False)
+        limited = build_size_tree(temp_dir, max_depth=max_depth, max_entries=max_entries, sort=sort)
+        out = StringIO()
+        write_tree("root", iter_size_tree(limited, sort, max_depth, max_entries), out, color=False)
+        assert out.getvalue() == full.getvalue(), f"Limited tree {sort} {max_depth} {max_entries}"
+        assert (limited.size, limited.files) == (3115, 4)
+    limited = build_size_tree(temp_dir, max_depth=1, max_entries=1, sort="size")
+    assert [node.name for node in limited.directories] == ["big"] and limited.file_entries == []
+    assert limited.directories[0].directories == limited.directories[0].file_entries == [], "Below max_depth"
+    shutil.rmtree(temp_dir)
+    print("All test cases passed successfully.")
+
+def test_export_tree():
+    temp_dir = Path(tempfile.mkdtemp())
+    (temp_dir / "sub").mkdir()
+    (temp_dir / "sub" / "a.txt").write_bytes(b"abc")
+    (temp_dir / "b.txt").touch()
+    (temp_dir / "c.txt").touch()
+    os.utime(temp_dir / "sub" / "a.txt", (1000, 1000))
+    out = StringIO()
+    export_tree(temp_dir, out)
+    records = [json.loads(line) for line in out.getvalue().splitlines()]
+    assert [(record["path"], record["depth"], record["type"], record["size"]) for record in records] == [
+        (os.fspath(temp_dir / "sub"), 1, "dir", None),
+        (os.fspath(temp_dir / "sub" / "a.txt"), 2, "file", 3),
+        (os.fspath(temp_dir / "b.txt"), 1, "file", 0),
+        (os.fspath(temp_dir / "c.txt"), 1, "file", 0),
+    ]
+    assert records[1]["mtime"] == 1000 and records[0]["mtime"] is not None
+    # The compact JSON array holds the same records, with the summary entries
+    out = StringIO()
+    export_tree(temp_dir, out, "json", max_entries=2)
+    records = json.loads(out.getvalue())
+    assert [record["type"] for record in records] == ["dir", "file", "file", "more"]
+    assert records[-1] == {"depth": 1, "type": "more", "count": 1}
+    assert ' ' not in out.getvalue().replace(temp_dir.name, '')
+    # The sizes mode exports the totals of the directories
+    out = StringIO()
+    write_records(iter_size_tree(build_size_tree(temp_dir)), out)
+    assert json.loads(out.getvalue().splitlines()[0])["size"] == 3
+    empty = StringIO()
+    write_records([], empty, "json")
+    assert json.loads(empty.getvalue()) == []
+    shutil.rmtree(temp_dir)
+    print("All test cases passed successfully.")
+
 #Uncomment the following line to run the test function
 # test_print_dir_tree()
+# test_walk_tree()
+# test_render_tree()
+# test_tree_snapshot()
+# test_render_size_tree()
+# test_export_tree()
+# benchmark_snapshot()
 
 if __name__ == "__main__":
     main()
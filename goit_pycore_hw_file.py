@@ -51,11 +51,51 @@ print(cats_info)
     {"id": "60b90c4613067a15887e1ae5", "name": "Tessi", "age": "5"},
 ]
 """
-from typing import List
+from typing import Iterator, List, NamedTuple, Optional, Sequence, Tuple
+from array import array
+from bisect import bisect_left, bisect_right
+from contextlib import redirect_stdout
+from operator import itemgetter
+import io
+import itertools
+import mmap
+import os
 import pathlib
+import tempfile
+import time
+import tracemalloc
+
+from goit_pycore_hw_cache import (HEADER, KIND_CAT_INDEX, KIND_CATS, CacheHeader, open_cache, read_sections,
+                                  source_digest, stamp_header, write_cache)
+from goit_pycore_hw_metrics import metrics
+from goit_pycore_hw_shards import SHARD_WORKERS, map_shards, shard_paths
 
 TEST_DATA_DIR = (pathlib.Path(__file__).parent).joinpath("test_data")
 
+# Default number of records in a batch of iter_cats_info_batches
+CATS_BATCH_SIZE = 10000
+# Number of bytes of lines the columnar loader validates at once
+CATS_BLOCK_SIZE = 4 << 20
+# Size of a packed cat id
+CAT_ID_SIZE = 12
+# Largest age an array('H') column can hold
+MAX_CAT_AGE = 0xFFFF
+HEX_DIGITS = b'0123456789abcdefABCDEF'
+# Suffix and format version of the CatIndex sidecar file
+CAT_INDEX_SUFFIX = ".idx"
+CAT_INDEX_VERSION = 2
+# Flag of a cats cache whose columns give exactly the rows of get_cats_info
+CATS_EXACT = 1
+
+
+class CatInfo(NamedTuple):
+    """Information about one cat, as read from a line of the file"""
+    id: str
+    name: str
+    age: str
+
+
+@metrics.timed("cats")
 def get_cats_info(path: str) -> List[dict]:
     """
     Reads the file and returns a list of dictionaries with information about each cat 
@@ -67,20 +107,57 @@ def get_cats_info(path: str) -> List[dict]:
     Returns:
         List[dict]: List of dictionaries with information about each cat
     """
-    cats_info = []
+    return [cat._asdict() for cat in iter_cats_info(path)]
+
+def iter_cats_info(path: str) -> Iterator[CatInfo]:
+    """
+    Reads the file lazily and yields the information about each cat
+    If the file is not found or corrupted, stops the iteration
+
+    Args:
+        path (str): Path to the file
+
+    Yields:
+        CatInfo: Information about the cat of a valid line
+    """
+    rows = 0
+    rejected = 0
     try:
         with open(path, 'r', encoding='utf-8') as file:
+            if metrics.enabled:
+                metrics.count("cats.bytes", os.fstat(file.fileno()).st_size)
             for line in file:
+                rows += 1
                 cat = line.strip().split(',')
                 if is_data_valid(cat):
-                    cats_info.append({"id": cat[0], "name": cat[1], "age": cat[2]})
+                    yield CatInfo(*cat)
                 else:
                     print(f"File '{path}' value '{cat}' is corrupted")
+                    rejected += 1
     except FileNotFoundError:
         print(f"File '{path}' not found")
     except ValueError:
         print(f"File '{path}' value is corrupted")
-    return cats_info
+    finally:
+        # also runs when the iteration is abandoned
+        metrics.count("cats.rows", rows)
+        metrics.count("cats.rejected", rejected)
+
+def iter_cats_info_batches(path: str, batch_size: int = CATS_BATCH_SIZE) -> Iterator[List[CatInfo]]:
+    """
+    Reads the file lazily and yields the information about the cats in lists of a fixed size,
+    the last list may be shorter
+
+    Args:
+        path (str): Path to the file
+        batch_size (int): Number of cats in a list
+
+    Yields:
+        List[CatInfo]: Information about the next batch_size cats
+    """
+    cats = iter_cats_info(path)
+    while batch := list(itertools.islice(cats, batch_size)):
+        yield batch
 
 def is_data_valid(data: list) -> bool:
     """
@@ -117,6 +194,653 @@ def is_data_valid(data: list) -> bool:
         return False
     return True
 
+class CatsShard(NamedTuple):
+    """
+    Result of one shard file of a bulk read
+
+    Attributes:
+        path (str): The path of the shard file
+        count (int): Number of valid cats
+        average_age (int): Average age of the valid cats
+        rejected (List[int]): Numbers of the invalid lines, starting from 0
+        corrupted (bool): True if the file is not valid UTF-8, the lines decoded before are kept as in get_cats_info
+        error (Optional[str]): The reason the file could not be read, None otherwise
+        cats (List[CatInfo]): The valid cats
+    """
+    path: str
+    count: int
+    average_age: int
+    rejected: List[int]
+    corrupted: bool
+    error: Optional[str]
+    cats: List[CatInfo]
+
+
+class CatsShardsReport(NamedTuple):
+    """
+    Merged result of a bulk read
+
+    Attributes:
+        count (int): Number of valid cats of all shards
+        average_age (int): Average age of the valid cats of all shards
+        rejected (int): Number of invalid lines of all shards
+        shards (List[CatsShard]): Results of the shards in path order, without their cats
+    """
+    count: int
+    average_age: int
+    rejected: int
+    shards: List[CatsShard]
+
+
+def _read_cats_shard(data: bytes) -> Tuple[List[CatInfo], List[int], bool]:
+    """
+    Parses the whole content of a shard file as get_cats_info does, runs in a worker thread or process
+    """
+    cats = []
+    rejected = []
+    line_number = -1
+    try:
+        for line_number, line in enumerate(io.TextIOWrapper(io.BytesIO(data), encoding='utf-8')):
+            cat = line.strip().split(',')
+            if is_data_valid(cat):
+                cats.append(CatInfo(*cat))
+            else:
+                rejected.append(line_number)
+    except ValueError:
+        return cats, rejected, True
+    return cats, rejected, False
+
+def iter_cats_shards(source: str, workers: int = SHARD_WORKERS, processes: Optional[int] = None,
+                     max_shards: Optional[int] = None) -> Iterator[CatsShard]:
+    """
+    Reads many cats files concurrently and yields one result per file in path order
+    The files are read by a pool of threads and parsed by a pool of processes if given
+
+    Args:
+        source (str): A directory of shard files or a glob pattern
+        workers (int): Number of reading threads
+        processes (Optional[int]): Number of parsing processes, the files are parsed in the threads if None
+        max_shards (Optional[int]): The largest number of files in memory at once, 2 * workers by default
+
+    Yields:
+        CatsShard: The result of a file with its valid cats
+    """
+    for result in map_shards(_read_cats_shard, shard_paths(source), workers, processes, max_shards):
+        if result.error is not None:
+            yield CatsShard(result.path, 0, 0, [], False, result.error, [])
+            continue
+        cats, rejected, corrupted = result.value
+        metrics.count("cats.bytes", result.size)
+        metrics.count("cats.rows", len(cats) + len(rejected))
+        metrics.count("cats.rejected", len(rejected))
+        average_age = sum(int(cat.age) for cat in cats) // len(cats) if cats else 0
+        yield CatsShard(result.path, len(cats), average_age, rejected, corrupted, None, cats)
+
+@metrics.timed("cats")
+def get_cats_info_shards(source: str, workers: int = SHARD_WORKERS, processes: Optional[int] = None,
+                         max_shards: Optional[int] = None) -> CatsShardsReport:
+    """
+    Counts the valid cats of many files and their average age, with the results of every file
+    The cats of a file are dropped once counted, use iter_cats_shards to keep them
+    The unreadable files and the invalid lines are reported
+
+    Args:
+        source (str): A directory of shard files or a glob pattern
+        workers (int): Number of reading threads
+        processes (Optional[int]): Number of parsing processes, the files are parsed in the threads if None
+        max_shards (Optional[int]): The largest number of files in memory at once, 2 * workers by default
+
+    Returns:
+        CatsShardsReport: The merged counts and the results of the files
+    """
+    count = 0
+    ages = 0
+    rejected = 0
+    shards = []
+    for shard in iter_cats_shards(source, workers, processes, max_shards):
+        if shard.error is not None:
+            print(f"File '{shard.path}' can not be read: {shard.error}")
+        elif shard.corrupted:
+            print(f"File '{shard.path}' value is corrupted")
+        if shard.rejected:
+            print(f"File '{shard.path}' has {len(shard.rejected)} corrupted lines {shard.rejected}")
+        count += shard.count
+        ages += sum(int(cat.age) for cat in shard.cats)
+        rejected += len(shard.rejected)
+        shards.append(shard._replace(cats=[]))
+    if not shards:
+        print("No files found")
+    return CatsShardsReport(count, ages // count if count else 0, rejected, shards)
+
+@metrics.timed("cats")
+def get_cats_info_mmap(path: str) -> List[dict]:
+    """
+    Reads the file without decoding it and returns a list of dictionaries with information about each cat.
+    If the file is not found or corrupted, returns an empty list
+
+    Args:
+        path (str): Path to the file
+
+    Returns:
+        List[dict]: List of dictionaries with information about each cat
+    """
+    return [cat._asdict() for cat in iter_cats_info_mmap(path)]
+
+def iter_cats_info_mmap(path: str) -> Iterator[CatInfo]:
+    """
+    Reads the file lazily without decoding it and yields the information about each cat.
+    The file is memory-mapped and scanned for comma and newline offsets, fields are validated
+    as bytes and decoded only for the valid rows.
+    If the file is not found or corrupted, stops the iteration
+
+    Unlike iter_cats_info, which reads the file in text mode, lines are split on b'\\n' only,
+    so a bare '\\r' does not end a line. Invalid UTF-8 stops the iteration at the line holding it,
+    while the text reader fails the whole decoded block of 8 KiB, dropping the valid lines before it
+
+    Args:
+        path (str): Path to the file
+
+    Yields:
+        CatInfo: Information about the cat of a valid line
+    """
+    rows = 0
+    rejected = 0
+    try:
+        with open(path, 'rb') as file:
+            size = os.fstat(file.fileno()).st_size
+            metrics.count("cats.bytes", size)
+            # an empty file can not be memory-mapped
+            if not size:
+                return
+            with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as buffer:
+                find = buffer.find
+                size = len(buffer)
+                start = 0
+                while start < size:
+                    end = find(b'\n', start)
+                    if end < 0:
+                        end = size
+                    rows += 1
+                    first = find(b',', start, end)
+                    second = find(b',', first + 1, end) if first >= 0 else -1
+                    if second >= 0 and find(b',', second + 1, end) < 0:
+                        cat_id = buffer[start:first].lstrip()
+                        name = buffer[first + 1:second]
+                        age = buffer[second + 1:end].rstrip()
+                    else:
+                        cat_id = name = age = None
+                    if cat_id is not None and is_raw_data_valid(cat_id, name, age):
+                        yield CatInfo(cat_id.decode('utf-8'), name.decode('utf-8'), age.decode('utf-8'))
+                    else:
+                        cat = buffer[start:end].decode('utf-8').strip().split(',')
+                        print(f"File '{path}' value '{cat}' is corrupted")
+                        rejected += 1
+                    start = end + 1
+    except FileNotFoundError:
+        print(f"File '{path}' not found")
+    except ValueError:
+        print(f"File '{path}' value is corrupted")
+    finally:
+        metrics.count("cats.rows", rows)
+        metrics.count("cats.rejected", rejected)
+
+def is_raw_data_valid(cat_id: bytes, name: bytes, age: bytes) -> bool:
+    """
+    Check if the raw fields of a cat row are valid, the bytes counterpart of is_data_valid
+
+    Args:
+        cat_id (bytes): The id field
+        name (bytes): The name field
+        age (bytes): The age field
+
+    Returns:
+        bool: True if the data is valid, False otherwise
+    """
+    # check the values not empty
+    if not (cat_id and name and age):
+        return False
+    # check the age is a positive number
+    if not age.isdigit() or not int(age) > 0:
+        return False
+    # check the id is a valid hexadecimal number of 24 digits
+    if not len(cat_id) == 24:
+        return False
+    try:
+        int(cat_id, 16)
+    except ValueError:
+        return False
+    return True
+
+class CatsTable:
+    """
+    Columnar storage of the cats: ids packed as 12-byte binary values, ages in an array('H')
+    and names in a UTF-8 pool indexed by offsets, so a cat takes tens of bytes instead of a dict
+    """
+    __slots__ = ("ids", "ages", "names", "name_offsets")
+
+    def __init__(self):
+        self.ids = bytearray()
+        self.ages = array('H')
+        self.names = bytearray()
+        self.name_offsets = array('Q', [0])
+
+    def __len__(self) -> int:
+        return len(self.ages)
+
+    def __getitem__(self, row: int) -> CatInfo:
+        if not 0 <= row < len(self):
+            raise IndexError("cats table index out of range")
+        return CatInfo(self.id(row), self.name(row), str(self.ages[row]))
+
+    def __iter__(self) -> Iterator[CatInfo]:
+        return map(self.__getitem__, range(len(self)))
+
+    def id(self, row: int) -> str:
+        """Returns the id of the cat in the row as a hexadecimal string"""
+        return self.ids[row * CAT_ID_SIZE:(row + 1) * CAT_ID_SIZE].hex()
+
+    def name(self, row: int) -> str:
+        """Returns the name of the cat in the row"""
+        return str(self.names[self.name_offsets[row]:self.name_offsets[row + 1]], 'utf-8')
+
+    def append_columns(self, ids: List[bytes], names: List[bytes], ages: List[bytes]):
+        """
+        Appends already validated columns to the table
+
+        Args:
+            ids (List[bytes]): Hexadecimal ids of 24 digits
+            names (List[bytes]): UTF-8 encoded names
+            ages (List[bytes]): Decimal ages
+        """
+        self.ids += bytes.fromhex(b''.join(ids).decode('ascii'))
+        self.ages.extend(map(int, ages))
+        base = self.name_offsets[-1]
+        self.names += b''.join(names)
+        self.name_offsets.extend(itertools.accumulate(map(len, names), initial=base))
+        # accumulate repeats the initial offset
+        del self.name_offsets[-len(names) - 1]
+
+
+class CatsTableLoad(NamedTuple):
+    """Result of load_cats_table: the valid cats, a per-line validity mask and the rejected line numbers"""
+    table: CatsTable
+    mask: bytearray
+    rejected: List[int]
+
+
+def validate_cats_columns(rows: List[List[bytes]]) -> bytearray:
+    """
+    Validates the fields of the rows one column at a time
+
+    The checks match is_data_valid, except that an id must consist of hexadecimal digits only
+    and an age must fit in 16 bits, as required by the packed columns
+
+    Args:
+        rows (List[List[bytes]]): Fields of the lines of the file
+
+    Returns:
+        bytearray: 1 for a valid row, 0 otherwise
+    """
+    shape = [len(row) == 3 for row in rows]
+    rows = [row if ok else (b'', b'', b'') for row, ok in zip(rows, shape)]
+    ids, names, ages = (list(map(itemgetter(i), rows)) for i in range(3))
+    id_ok = (len(cat_id) == 24 and not cat_id.translate(None, HEX_DIGITS) for cat_id in ids)
+    name_ok = map(bool, names)
+    age_ok = (age.isdigit() and 0 < int(age) <= MAX_CAT_AGE for age in ages)
+    return bytearray(map(all, zip(shape, id_ok, name_ok, age_ok)))
+
+@metrics.timed("cats")
+def load_cats_table(path: str) -> CatsTableLoad:
+    """
+    Reads the file into a columnar table, validating the lines in blocks of CATS_BLOCK_SIZE bytes
+    If the file is not found, returns an empty table
+
+    Args:
+        path (str): Path to the file
+
+    Returns:
+        CatsTableLoad: The table of the valid cats, the validity mask and the numbers of the rejected lines
+    """
+    return _load_cats_table(path)[0]
+
+def _load_cats_table(path: str, rejected_lines: Optional[List[bytes]] = None) -> Tuple[CatsTableLoad, bool]:
+    # also collects the rejected lines and checks the table is exact if a list is given
+    table = CatsTable()
+    mask = bytearray()
+    rejected = []
+    exact = True
+    try:
+        with open(path, 'rb') as file:
+            if metrics.enabled:
+                metrics.count("cats.bytes", os.fstat(file.fileno()).st_size)
+            while lines := file.readlines(CATS_BLOCK_SIZE):
+                rows = [line.strip().split(b',') for line in lines]
+                block_mask = validate_cats_columns(rows)
+                valid = list(itertools.compress(rows, block_mask))
+                columns = [list(map(itemgetter(i), valid)) for i in range(3)]
+                if valid:
+                    table.append_columns(*columns)
+                base = len(mask)
+                rejected.extend(base + i for i, ok in enumerate(block_mask) if not ok)
+                mask += block_mask
+                if rejected_lines is not None:
+                    rejected_lines.extend(line for line, ok in zip(lines, block_mask) if not ok)
+                    exact = exact and is_cats_block_exact(lines, columns, block_mask)
+    except FileNotFoundError:
+        print(f"File '{path}' not found")
+    metrics.count("cats.rows", len(mask))
+    metrics.count("cats.rejected", len(rejected))
+    return CatsTableLoad(table, mask, rejected), exact
+
+def is_cats_block_exact(lines: List[bytes], columns: List[List[bytes]], mask: bytearray) -> bool:
+    """
+    Check if get_cats_info reads a block of lines exactly as the columns store it: the text decodes,
+    is split into the same lines, the valid rows are in the canonical form of the columns
+    (lowercase id, age without leading zeros) and the rejected rows are rejected by is_data_valid
+
+    Args:
+        lines (List[bytes]): The lines of the block
+        columns (List[List[bytes]]): The ids, names and ages of the valid rows
+        mask (bytearray): 1 for a valid row, 0 otherwise
+
+    Returns:
+        bool: True if the block is exact, False otherwise
+    """
+    block = b''.join(lines)
+    # the text mode also ends a line at a lone carriage return
+    if block.count(b'\r') != block.count(b'\r\n'):
+        return False
+    try:
+        block.decode('utf-8')
+    except UnicodeDecodeError:
+        return False
+    ids, _, ages = columns
+    if any(cat_id != cat_id.lower() for cat_id in ids) or b',0' in b','.join([b''] + ages):
+        return False
+    for line, ok in zip(lines, mask):
+        if not ok:
+            # the text mode also strips Unicode whitespace and accepts Unicode digits and large ages
+            try:
+                if is_data_valid(str(line, 'utf-8').strip().split(',')):
+                    return False
+            except ValueError:
+                return False
+    return True
+
+def build_cats_cache(path: str) -> CatsTableLoad:
+    """
+    Parses the file into a columnar table and saves the columns to its binary cache file
+
+    Args:
+        path (str): Path to the file
+
+    Returns:
+        CatsTableLoad: The table of the valid cats, the validity mask and the numbers of the rejected lines
+    """
+    return _build_cats_cache(path)[0]
+
+def _build_cats_cache(path: str) -> Tuple[CatsTableLoad, bool, Sequence[bytes]]:
+    # the rejected lines are kept in the cache for the messages of get_cats_info_cached
+    stamp = stamp_header(path)
+    rejected_lines = []
+    load, exact = _load_cats_table(path, rejected_lines)
+    if stamp is not None:
+        table = load.table
+        header = CacheHeader(KIND_CATS, *stamp[:2], stamp[2], source_digest(path), len(table), len(load.rejected),
+                             CATS_EXACT if exact else 0)
+        line_offsets = array('Q', itertools.accumulate(map(len, rejected_lines), initial=0))
+        write_cache(path, header, [table.name_offsets, array('Q', load.rejected), line_offsets,
+                                   table.ages, table.ids, table.names, b''.join(rejected_lines)])
+    return load, exact, rejected_lines
+
+def load_cats_cache(path: str, verify: bool = False) -> Optional[CatsTableLoad]:
+    """
+    Memory-maps the columns of the binary cache file of the file into a read-only table, without parsing the text
+
+    Args:
+        path (str): Path to the file
+        verify (bool): True to check the content hash of the file even if its mtime is old enough
+
+    Returns:
+        Optional[CatsTableLoad]: The table backed by the cache file, None if the cache is missing or stale
+    """
+    cached = _load_cats_cache(path, verify)
+    return None if cached is None else cached[0]
+
+def _load_cats_cache(path: str, verify: bool = False) -> Optional[Tuple[CatsTableLoad, bool, Sequence[bytes]]]:
+    cached = open_cache(path, KIND_CATS, verify)
+    if cached is None:
+        return None
+    header, body = cached
+    rows, extra = header.rows, header.extra
+    # the sizes of the names and of the rejected lines are the last offsets
+    sizes = (8 * (rows + 1), 8 * extra, 8 * (extra + 1))
+    sections = read_sections(body, *sizes)
+    if sections is None:
+        return None
+    name_offsets, _, line_offsets = (section.cast('Q') for section in sections)
+    sizes += (2 * rows, CAT_ID_SIZE * rows, name_offsets[-1], line_offsets[-1])
+    sections = read_sections(body, *sizes)
+    if sections is None:
+        return None
+    table = CatsTable()
+    _, rejected, _, ages, table.ids, table.names, lines = sections
+    table.name_offsets, table.ages = name_offsets, ages.cast('H')
+    rejected = rejected.cast('Q')
+    mask = bytearray(b'\1') * (rows + len(rejected))
+    for line in rejected:
+        mask[line] = 0
+    rejected_lines = [lines[line_offsets[i]:line_offsets[i + 1]] for i in range(extra)]
+    return CatsTableLoad(table, mask, list(rejected)), bool(header.flags & CATS_EXACT), rejected_lines
+
+@metrics.timed("cats")
+def load_cats_table_cached(path: str, verify: bool = False) -> CatsTableLoad:
+    """
+    Loads the table of the file from its binary cache file, building the cache if it is missing or stale
+    The cats are the same as the ones of load_cats_table
+    If the file is not found, returns an empty table
+
+    Args:
+        path (str): Path to the file
+        verify (bool): True to check the content hash of the file even if its mtime is old enough
+
+    Returns:
+        CatsTableLoad: The table of the valid cats, the validity mask and the numbers of the rejected lines
+    """
+    load = load_cats_cache(path, verify)
+    if load is None:
+        return build_cats_cache(path)
+    metrics.count("cats.rows", len(load.mask))
+    metrics.count("cats.rejected", len(load.rejected))
+    return load
+
+def get_cats_info_cached(path: str) -> List[dict]:
+    """
+    Returns the same list of dictionaries as get_cats_info, read from the binary cache file of the file
+    The corrupted lines are printed as by get_cats_info. A file the columns can not represent exactly,
+    with uppercase ids, ages with leading zeros or above MAX_CAT_AGE, or text that is not UTF-8,
+    is read by get_cats_info instead
+
+    Args:
+        path (str): Path to the file
+
+    Returns:
+        List[dict]: List of dictionaries with information about each cat
+    """
+    cached = _load_cats_cache(path)
+    if cached is None:
+        cached = _build_cats_cache(path)
+    else:
+        metrics.count("cats.rows", len(cached[0].mask))
+        metrics.count("cats.rejected", len(cached[0].rejected))
+    load, exact, rejected_lines = cached
+    if not exact:
+        return get_cats_info(path)
+    for line in rejected_lines:
+        cat = str(line, 'utf-8').strip().split(',')
+        print(f"File '{path}' value '{cat}' is corrupted")
+    table = load.table
+    # the columns are decoded in bulk instead of row by row
+    ids = table.ids.hex()
+    names = bytes(table.names)
+    offsets = table.name_offsets
+    return [{"id": ids[row * 24:row * 24 + 24], "name": names[offsets[row]:offsets[row + 1]].decode('utf-8'),
+             "age": str(age)} for row, age in enumerate(table.ages)]
+
+class CatIndex:
+    """
+    Lookup of the cats of a file by id, by name prefix and by age range, built on a CatsTable.
+    The index is saved to a binary sidecar file next to the source, in the format of goit_pycore_hw_cache,
+    and memory-mapped from it while the source keeps its size, modification time and content
+    """
+
+    def __init__(self, table: CatsTable, name_order: Sequence[int], age_order: Sequence[int],
+                 header: Optional[CacheHeader] = None):
+        """
+        Args:
+            table (CatsTable): The cats
+            name_order (Sequence[int]): Rows of the table sorted by name
+            age_order (Sequence[int]): Rows of the table sorted by age
+            header (Optional[CacheHeader]): The header of the sidecar file with the stamp of the source,
+                None if the source does not exist
+        """
+        self.table = table
+        self.name_order = name_order
+        self.age_order = age_order
+        self.header = header
+        ids = table.ids
+        # the first row wins for a duplicated id
+        self.rows_by_id = {bytes(ids[row * CAT_ID_SIZE:(row + 1) * CAT_ID_SIZE]): row
+                           for row in reversed(range(len(table)))}
+
+    def __len__(self) -> int:
+        return len(self.table)
+
+    @classmethod
+    def build(cls, path: str) -> "CatIndex":
+        """
+        Parses the file and builds the index
+
+        Args:
+            path (str): Path to the file
+
+        Returns:
+            CatIndex: The index of the valid cats of the file
+        """
+        stamp = stamp_header(path)
+        digest = source_digest(path) if stamp is not None else b''
+        table = load_cats_table(path).table
+        rows = range(len(table))
+        name_order = array('Q', sorted(rows, key=table.name))
+        age_order = array('Q', sorted(rows, key=table.ages.__getitem__))
+        header = None
+        if stamp is not None:
+            header = CacheHeader(KIND_CAT_INDEX, *stamp, digest, len(table), 0, CAT_INDEX_VERSION)
+        return cls(table, name_order, age_order, header)
+
+    @classmethod
+    def open(cls, path: str) -> "CatIndex":
+        """
+        Loads the index from the sidecar file of the source, or builds and saves it if the sidecar
+        is missing or stale
+
+        Args:
+            path (str): Path to the file
+
+        Returns:
+            CatIndex: The index of the valid cats of the file
+        """
+        index = cls.load(path)
+        if index is None:
+            index = cls.build(path)
+            index.save(path)
+        return index
+
+    @classmethod
+    def load(cls, path: str) -> Optional["CatIndex"]:
+        """
+        Loads the index from the sidecar file of the source
+
+        Args:
+            path (str): Path to the source file
+
+        Returns:
+            Optional[CatIndex]: The index, None if the sidecar is missing, unreadable, inconsistent or stale
+        """
+        cached = open_cache(path, KIND_CAT_INDEX, suffix=CAT_INDEX_SUFFIX)
+        if cached is None:
+            return None
+        header, body = cached
+        rows = header.rows
+        if header.flags != CAT_INDEX_VERSION:
+            return None
+        # the size of the names is the last name offset
+        sections = read_sections(body, 8 * (rows + 1))
+        if sections is None:
+            return None
+        sizes = (8 * (rows + 1), 8 * rows, 8 * rows, 2 * rows, CAT_ID_SIZE * rows, sections[0].cast('Q')[-1])
+        sections = read_sections(body, *sizes)
+        if sections is None:
+            return None
+        name_offsets, name_order, age_order, ages, ids, names = sections
+        table = CatsTable()
+        table.name_offsets, table.ages, table.ids, table.names = name_offsets.cast('Q'), ages.cast('H'), ids, names
+        name_order, age_order = name_order.cast('Q'), age_order.cast('Q')
+        # a damaged sidecar must not fail the lookups later
+        offsets = table.name_offsets
+        if (rows and (max(name_order) >= rows or max(age_order) >= rows)
+                or any(offsets[row] > offsets[row + 1] for row in range(rows))):
+            return None
+        try:
+            str(names, 'utf-8')
+        except ValueError:
+            return None
+        return cls(table, name_order, age_order, header)
+
+    def save(self, path: str):
+        """
+        Saves the index to the sidecar file of the source
+
+        Args:
+            path (str): Path to the source file
+        """
+        if self.header is None:
+            return
+        table = self.table
+        sections = [table.name_offsets, self.name_order, self.age_order, table.ages, table.ids, table.names]
+        # the sidecar is not written if the source changed since it was parsed
+        write_cache(path, self.header, sections, suffix=CAT_INDEX_SUFFIX)
+
+    def by_id(self, cat_id: str) -> Optional[CatInfo]:
+        """Returns the cat with the id, None if there is no such cat"""
+        try:
+            row = self.rows_by_id.get(bytes.fromhex(cat_id))
+        except ValueError:
+            return None
+        return None if row is None else self.table[row]
+
+    def by_name_prefix(self, prefix: str) -> Iterator[CatInfo]:
+        """Yields the cats whose name starts with the prefix, sorted by name"""
+        name = self.table.name
+        start = bisect_left(self.name_order, prefix, key=name)
+        for row in itertools.islice(self.name_order, start, None):
+            if not name(row).startswith(prefix):
+                break
+            yield self.table[row]
+
+    def by_age(self, low: int, high: int) -> Iterator[CatInfo]:
+        """Yields the cats with an age from low to high inclusive, sorted by age"""
+        age = self.table.ages.__getitem__
+        start = bisect_left(self.age_order, low, key=age)
+        stop = bisect_right(self.age_order, high, lo=start, key=age)
+        return map(self.table.__getitem__, itertools.islice(self.age_order, start, stop))
+
+
+def cat_index_path(path: str) -> pathlib.Path:
+    """Returns the path of the CatIndex sidecar file of the source file"""
+    path = pathlib.Path(path)
+    return path.with_name(path.name + CAT_INDEX_SUFFIX)
+
 # Test function with test cases
 def test_get_cats_info():
     # Test case 1: Check for correct cats info
@@ -145,5 +869,223 @@ def test_get_cats_info():
     assert cats_info == cats_expected_broken_info, "Test corrupted file data case 3 failed"
     print("All test cases passed successfully")
 
+def test_get_cats_info_mmap():
+    # Test case 1: Check the memory-mapped parser matches the text one on the test files
+    for name in ["cats_file.txt", "cats_file1.txt", "cats_file2.txt"]:
+        path = pathlib.PurePath(TEST_DATA_DIR, name)
+        assert get_cats_info_mmap(path) == get_cats_info(path), f"Test case 1 {name} failed"
+    
+    # Test case 2: Check blank lines, surrounding spaces, extra fields and an empty file
+    with tempfile.TemporaryDirectory() as temp_dir:
+        path = os.path.join(temp_dir, "cats.txt")
+        for data in ["", "\n\n", " 60b90c1c13067a15887e1ae1,Tay son,3 \r\n",
+                     "60b90c1c13067a15887e1ae1,Tayson,3,4\n60b90c2413067a15887e1ae2,,1\n",
+                     "60b90c1c13067a15887e1ae1,Tayson,0\n60b90c1c13067a15887e1aeZ,Tayson,3"]:
+            with open(path, 'w', encoding='utf-8', newline='') as file:
+                file.write(data)
+            assert get_cats_info_mmap(path) == get_cats_info(path), f"Test case 2 {data!r} failed"
+        
+        # Test case 3: Check the documented differences, a bare carriage return and invalid UTF-8
+        cat = "60b90c1c13067a15887e1ae1,Tayson,3"
+        with open(path, 'wb') as file:
+            file.write(f"{cat}\r{cat}\n".encode())
+        assert len(get_cats_info(path)) == 2 and get_cats_info_mmap(path) == [], "Test case 3 CR failed"
+        with open(path, 'wb') as file:
+            file.write(f"{cat}\n".encode() + b"\xff\xfe\n")
+        assert get_cats_info(path) == [] and len(get_cats_info_mmap(path)) == 1, "Test case 3 UTF-8 failed"
+    print("All test cases passed successfully")
+
+def test_iter_cats_info():
+    # Test case 1: Check the cats are yielded lazily as records
+    cats = iter_cats_info(pathlib.PurePath(TEST_DATA_DIR, "cats_file.txt"))
+    assert next(cats) == CatInfo("60b90c1c13067a15887e1ae1", "Tayson", "3"), "Test first cat case 1 failed"
+    assert next(cats).name == "Vika", "Test second cat case 1 failed"
+    cats.close()
+    
+    # Test case 2: Check the batches have a fixed size and the last one holds the rest
+    batches = list(iter_cats_info_batches(pathlib.PurePath(TEST_DATA_DIR, "cats_file.txt"), 2))
+    assert [len(batch) for batch in batches] == [2, 2, 1], "Test batches sizes case 2 failed"
+    assert batches[2] == [CatInfo("60b90c4613067a15887e1ae5", "Tessi", "5")], "Test last batch case 2 failed"
+    
+    # Test case 3: Check for file not found
+    assert list(iter_cats_info_batches(pathlib.PurePath(TEST_DATA_DIR, "cats_file1.txt"))) == [], \
+        "Test file not found case 3 failed"
+    print("All test cases passed successfully")
+
+def test_load_cats_table():
+    # Test case 1: Check the table holds the same cats as get_cats_info
+    for name in ["cats_file.txt", "cats_file2.txt"]:
+        path = pathlib.PurePath(TEST_DATA_DIR, name)
+        table, mask, rejected = load_cats_table(path)
+        assert [cat._asdict() for cat in table] == get_cats_info(path), f"Test table {name} case 1 failed"
+    assert list(mask) == [1, 1, 1, 1, 0, 0] and rejected == [4, 5], "Test mask case 1 failed"
+    assert len(table.ids) == 4 * CAT_ID_SIZE and table.id(3) == "60b90c3b13067a15887e1ae4", "Test ids case 1 failed"
+    
+    # Test case 2: Check the columns are validated across several blocks
+    global CATS_BLOCK_SIZE
+    block_size, CATS_BLOCK_SIZE = CATS_BLOCK_SIZE, 64
+    try:
+        with tempfile.TemporaryDirectory() as temp_dir:
+            path = os.path.join(temp_dir, "cats.txt")
+            with open(path, 'w', encoding='utf-8') as file:
+                file.writelines(f"{i:024x},Кіт {i},{i % 3}\n" for i in range(100))
+                file.write("0x0000000000000000000001,Hex,1\n60b90c1c13067a15887e1ae1,Old,70000\n")
+            table, mask, rejected = load_cats_table(path)
+            assert rejected == list(range(0, 100, 3)) + [100, 101], "Test rejected case 2 failed"
+            assert [cat._asdict() for cat in table] == get_cats_info(path)[:-2], "Test table case 2 failed"
+            assert table[1] == CatInfo(f"{2:024x}", "Кіт 2", "2"), "Test row case 2 failed"
+    finally:
+        CATS_BLOCK_SIZE = block_size
+    
+    # Test case 3: Check for file not found
+    assert len(load_cats_table(pathlib.PurePath(TEST_DATA_DIR, "cats_file1.txt")).table) == 0, \
+        "Test file not found case 3 failed"
+    print("All test cases passed successfully")
+
+def test_cat_index():
+    with tempfile.TemporaryDirectory() as temp_dir:
+        path = os.path.join(temp_dir, "cats.txt")
+        with open(pathlib.PurePath(TEST_DATA_DIR, "cats_file2.txt"), 'rb') as source, open(path, 'wb') as file:
+            file.write(source.read())
+        index = CatIndex.open(path)
+        
+        # Test case 1: Check the lookups
+        assert index.by_id("60b90c2413067a15887e1ae2").name == "Vika", "Test by id case 1 failed"
+        assert index.by_id("60b90c2413067a15887e1ae9") is None and index.by_id("xyz") is None, \
+            "Test missing id case 1 failed"
+        assert [cat.name for cat in index.by_name_prefix("S")] == ["Simon"], "Test name prefix case 1 failed"
+        assert [cat.name for cat in index.by_name_prefix("")] == ["Barsik", "Simon", "Tayson", "Vika"], \
+            "Test empty prefix case 1 failed"
+        assert [cat.name for cat in index.by_age(2, 12)] == ["Barsik", "Tayson", "Simon"], "Test age range case 1 failed"
+        
+        # Test case 2: Check the index is reloaded from the sidecar file
+        sidecar_mtime = cat_index_path(path).stat().st_mtime_ns
+        reloaded = CatIndex.open(path)
+        assert cat_index_path(path).stat().st_mtime_ns == sidecar_mtime, "Test sidecar rewritten case 2 failed"
+        assert list(reloaded.table) == list(index.table), "Test reloaded table case 2 failed"
+        assert reloaded.by_id("60b90c3b13067a15887e1ae4").age == "12", "Test reloaded by id case 2 failed"
+        
+        # Test case 3: Check a changed source makes the sidecar stale
+        with open(path, 'a', encoding='utf-8') as file:
+            file.write("\n60b90c4613067a15887e1ae5,Tessi,5\n")
+        assert CatIndex.load(path) is None, "Test stale sidecar case 3 failed"
+        assert [cat.name for cat in CatIndex.open(path).by_name_prefix("T")] == ["Tayson", "Tessi"], \
+            "Test rebuilt index case 3 failed"
+        
+        # Test case 4: Check a damaged sidecar is rebuilt, never trusted
+        sidecar = cat_index_path(path)
+        content = sidecar.read_bytes()
+        name_order = HEADER.size + 8 * 6
+        for damaged in (b"", b"\x80\x05]\x94.", content[:-8], os.urandom(len(content)),
+                        content[:name_order] + b"\xff" * 8 + content[name_order + 8:]):
+            sidecar.write_bytes(damaged)
+            assert CatIndex.load(path) is None, f"Test damaged sidecar {damaged[:8]!r} case 4 failed"
+            assert [cat.name for cat in CatIndex.open(path).by_age(5, 5)] == ["Tessi"], \
+                f"Test rebuilt index {damaged[:8]!r} case 4 failed"
+            assert CatIndex.load(path) is not None, "Test rewritten sidecar case 4 failed"
+    print("All test cases passed successfully")
+
+def benchmark_get_cats_info(size_mb: int = 1024):
+    """
+    Compares the wall time and the peak of allocated memory of get_cats_info and get_cats_info_mmap
+    on a generated file of the given size.
+
+    Args:
+        size_mb (int): The size of the generated file in megabytes
+    """
+    with tempfile.TemporaryDirectory() as temp_dir:
+        path = os.path.join(temp_dir, "cats.txt")
+        block = "".join(f"{i:024x},Cat {i},{i % 20 + 1}\n" for i in range(10000))
+        with open(path, 'w', encoding='utf-8') as file:
+            for _ in range(max(1, size_mb * (1 << 20) // len(block))):
+                file.write(block)
+        for function in (get_cats_info, get_cats_info_mmap):
+            started = time.perf_counter()
+            function(path)
+            elapsed = time.perf_counter() - started
+            tracemalloc.start()
+            function(path)
+            _, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            print(f"{function.__name__:<20} {elapsed:8.2f} s {peak / (1 << 20):10.1f} MiB peak")
+
+def test_get_cats_info_shards():
+    with tempfile.TemporaryDirectory() as temp_dir:
+        data = [
+            b"60b90c1c13067a15887e1ae1,Tayson,3\n60b90c2413067a15887e1ae2,Vika,1\n",
+            b"60b90c2e13067a15887e1ae3,Barsik,2\nbroken line\n60b90c3b13067a15887e1ae4,Simon,12\n",
+            b"60b90c4613067a15887e1ae5,Tessi,5\n\xff\xfe\n",
+        ]
+        for i, content in enumerate(data):
+            with open(os.path.join(temp_dir, f"cats{i}.txt"), 'wb') as file:
+                file.write(content)
+        for processes in (None, 2):
+            shards = list(iter_cats_shards(temp_dir, workers=2, processes=processes, max_shards=1))
+            assert [shard.cats for shard in shards] == [
+                list(iter_cats_info(os.path.join(temp_dir, f"cats{i}.txt"))) for i in range(3)]
+            assert [(shard.count, shard.average_age, shard.rejected) for shard in shards] == [
+                (2, 2, []), (2, 7, [1]), (0, 0, [])]
+            assert [shard.corrupted for shard in shards] == [False, False, True]
+        report = get_cats_info_shards(os.path.join(temp_dir, "*.txt"))
+        assert (report.count, report.average_age, report.rejected) == (4, 4, 1)
+        assert all(shard.cats == [] for shard in report.shards), "The cats are dropped from the report"
+        assert get_cats_info_shards(os.path.join(temp_dir, "missing")) == (0, 0, 0, [])
+    print("All test cases passed successfully.")
+
+def test_load_cats_table_cached():
+    with tempfile.TemporaryDirectory() as temp_dir:
+        path = os.path.join(temp_dir, "cats.txt")
+        with open(path, 'w', encoding='utf-8') as file:
+            file.writelines(f"{i:024x},Кіт {i},{i % 3}\n" for i in range(100))
+        past = time.time_ns() - 10 ** 10
+        os.utime(path, ns=(past, past))
+        
+        # Test case 1: Check the cold and the warm loads match load_cats_table
+        expected = load_cats_table(path)
+        for run in ("cold", "warm"):
+            table, mask, rejected = load_cats_table_cached(path)
+            assert list(table) == list(expected.table), f"Test table {run} case 1 failed"
+            assert (mask, rejected) == (expected.mask, expected.rejected), f"Test mask {run} case 1 failed"
+        assert isinstance(table.ids, memoryview) and table.name(0) == "Кіт 1", "Test memory-mapped case 1 failed"
+        assert get_cats_info_cached(path) == get_cats_info(path), "Test dictionaries case 1 failed"
+        
+        # Test case 2: Check a changed file rebuilds the cache
+        with open(path, 'a', encoding='utf-8') as file:
+            file.write("60b90c4613067a15887e1ae5,Tessi,5\n")
+        assert load_cats_cache(path) is None, "Test stale cache case 2 failed"
+        assert load_cats_table_cached(path).table[66].name == "Tessi", "Test rebuilt table case 2 failed"
+        assert len(load_cats_cache(path).table) == 67, "Test rebuilt cache case 2 failed"
+        
+        # Test case 3: Check an empty file and a missing file
+        with open(path, 'w', encoding='utf-8') as file:
+            pass
+        assert len(load_cats_table_cached(path).table) == 0 and len(load_cats_cache(path).table) == 0
+        assert len(load_cats_table_cached(os.path.join(temp_dir, "missing.txt")).table) == 0
+        
+        # Test case 4: Check the dictionaries and the messages match get_cats_info for rows the columns can not hold
+        samples = [["60b90c1c13067a15887e1ae1,Tayson,3\n", "bad\n", "60b90c2413067a15887e1ae2,Vika,\n"],
+                   ["60B90C1C13067A15887E1AE1,Tayson,03\n", "60b90c2413067a15887e1ae2,Big,70000\n"],
+                   ["60b90c1c13067a15887e1ae1,Tayson,3\u00a0\r\n"],
+                   ["60b90c1c13067a15887e1ae1,Tay\rson,3\n"]]
+        for lines in samples:
+            with open(path, 'w', encoding='utf-8', newline='') as file:
+                file.writelines(lines)
+            os.utime(path, ns=(past, past))
+            for run in ("cold", "warm"):
+                with redirect_stdout(io.StringIO()) as cached_out:
+                    cached = get_cats_info_cached(path)
+                with redirect_stdout(io.StringIO()) as text_out:
+                    expected = get_cats_info(path)
+                assert cached == expected, f"Test dictionaries {run} {lines} case 4 failed"
+                assert cached_out.getvalue() == text_out.getvalue(), f"Test messages {run} {lines} case 4 failed"
+    print("All test cases passed successfully")
+
 # Uncomment the line below to run the test function
 # test_get_cats_info()
+# test_get_cats_info_mmap()
+# test_iter_cats_info()
+# test_load_cats_table()
+# test_cat_index()
+# test_get_cats_info_shards()
+# test_load_cats_table_cached()
+# benchmark_get_cats_info()
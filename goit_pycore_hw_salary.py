@@ -11,12 +11,50 @@ Sitarama Raju,1000
 Ваше завдання - розробити функцію total_salary(path), яка читає цей файл та повертає кортеж з двома значеннями:
 
 """
-from typing import Tuple
+from typing import Iterator, List, NamedTuple, Optional, Sequence, Tuple
+from array import array
+from concurrent.futures import ProcessPoolExecutor
+import mmap
+import os
 import pathlib
+import tempfile
+import time
+import tracemalloc
+
+from goit_pycore_hw_cache import (KIND_SALARY, CacheHeader, new_digest, open_cache, read_sections, stamp_header,
+                                  write_cache)
+from goit_pycore_hw_metrics import metrics
+from goit_pycore_hw_shards import SHARD_WORKERS, map_shards, shard_paths
 
 TEST_DATA_DIR = (pathlib.Path(__file__).parent).joinpath("test_data")
 
+# Smallest byte range worth shipping to a worker process
+MIN_CHUNK_SIZE = 1 << 20
+# Size of the blocks a worker reads from its byte range
+READ_BLOCK_SIZE = 8 << 20
+
+
+class SalaryChunk(NamedTuple):
+    """
+    Partial result of aggregating one byte range of a salary file.
+
+    Attributes:
+    - start (int): Offset of the first byte of the range.
+    - end (int): Offset just past the last byte of the range.
+    - total (int): Sum of the salaries in the range.
+    - count (int): Number of rows in the range, corrupted rows included.
+    - bad_rows (List[int]): Byte offsets of the rows without a salary value.
+    - corrupted (bool): True if a salary value is not an integer, the range is aggregated up to that row.
+    """
+    start: int
+    end: int
+    total: int
+    count: int
+    bad_rows: List[int]
+    corrupted: bool
 
+
+@metrics.timed("salary")
 def total_salary(path: str) -> Tuple[int, int]:
     """
     Calculates the total salary and the average salary from a file.
@@ -35,25 +73,557 @@ def total_salary(path: str) -> Tuple[int, int]:
     """
     total = 0
     count = 0
+    rejected = 0
     try:
         with open(path, 'r', encoding='utf-8') as file:
+            if metrics.enabled:
+                metrics.count("salary.bytes", os.fstat(file.fileno()).st_size)
             for line in file:
                 count += 1
                 try:
                     total += int(line.split(',')[1])
                 except IndexError:
                     print(f"File data '{line}' is corrupted")
+                    rejected += 1
                     total += 0
     except FileNotFoundError:
         print("File not found")
     except ValueError:
         print("File is corrupted")
+    finally:
+        metrics.count("salary.rows", count)
+        metrics.count("salary.rejected", rejected)
     try:
         return total, total // count if count else 0
     except ZeroDivisionError:
         print("File is empty")
         return 0, 0
 
+def _aggregate_lines(data: bytes, offset: int, chunk: list) -> bool:
+    """
+    Adds the complete lines of the data block to the chunk accumulator [total, count, bad_rows].
+    
+    Parameters:
+    - data (bytes): Block of whole lines, the last line may lack the trailing newline.
+    - offset (int): File offset of the first byte of the block.
+    - chunk (list): Accumulator updated in place.
+    
+    Returns:
+    - bool: False if a salary value is not an integer and the aggregation must stop, True otherwise.
+    """
+    lines = data.split(b'\n')
+    if lines and not lines[-1]:
+        lines.pop()
+    total, count, bad_rows = chunk
+    try:
+        for line in lines:
+            count += 1
+            try:
+                total += int(line.split(b',')[1])
+            except IndexError:
+                bad_rows.append(offset)
+            offset += len(line) + 1
+    except ValueError:
+        return False
+    finally:
+        chunk[0], chunk[1] = total, count
+    return True
+
+def _aggregate_range(path: str, start: int, end: int) -> SalaryChunk:
+    """
+    Aggregates the salaries of the newline-aligned byte range [start, end) of a file.
+    The range is read in blocks of READ_BLOCK_SIZE bytes so a worker never holds the whole range.
+    
+    Parameters:
+    - path (str): The path to the file containing employee data.
+    - start (int): Offset of the first byte of the range.
+    - end (int): Offset just past the last byte of the range.
+    
+    Returns:
+    - SalaryChunk: The partial result for the range.
+    """
+    chunk = [0, 0, []]
+    tail = b''
+    position = start
+    with open(path, 'rb') as file:
+        file.seek(start)
+        while position < end:
+            block = file.read(min(READ_BLOCK_SIZE, end - position))
+            if not block:
+                break
+            position += len(block)
+            block = tail + block
+            cut = block.rfind(b'\n') + 1 if position < end else len(block)
+            tail = block[cut:]
+            if not _aggregate_lines(block[:cut], position - len(block), chunk):
+                return SalaryChunk(start, end, chunk[0], chunk[1], chunk[2], True)
+    if tail and not _aggregate_lines(tail, end - len(tail), chunk):
+        return SalaryChunk(start, end, chunk[0], chunk[1], chunk[2], True)
+    return SalaryChunk(start, end, chunk[0], chunk[1], chunk[2], False)
+
+def _chunk_ranges(path: str, parts: int) -> List[Tuple[int, int]]:
+    """
+    Splits a file into at most `parts` byte ranges, each one ending right after a newline.
+    
+    Parameters:
+    - path (str): The path to the file.
+    - parts (int): The desired number of ranges.
+    
+    Returns:
+    - List[Tuple[int, int]]: The (start, end) offsets of the ranges in file order.
+    """
+    size = os.path.getsize(path)
+    parts = max(1, min(parts, size // MIN_CHUNK_SIZE))
+    bounds = [0]
+    with open(path, 'rb') as file:
+        for i in range(1, parts):
+            guess = max(size * i // parts, bounds[-1])
+            file.seek(guess)
+            file.readline()
+            bound = file.tell()
+            if bound >= size:
+                break
+            if bound > bounds[-1]:
+                bounds.append(bound)
+    bounds.append(size)
+    return [(bounds[i], bounds[i + 1]) for i in range(len(bounds) - 1) if bounds[i] < bounds[i + 1]]
+
+def aggregate_salary_chunks(path: str, workers: Optional[int] = None) -> List[SalaryChunk]:
+    """
+    Aggregates a salary file in newline-aligned byte ranges, one range per worker process.
+    
+    Parameters:
+    - path (str): The path to the file containing employee data.
+    - workers (Optional[int]): Number of worker processes, defaults to the number of CPUs.
+    
+    Returns:
+    - List[SalaryChunk]: Partial results of every range in file order.
+    """
+    workers = workers or os.cpu_count() or 1
+    ranges = _chunk_ranges(path, workers)
+    if len(ranges) <= 1:
+        return [_aggregate_range(path, start, end) for start, end in ranges]
+    with ProcessPoolExecutor(max_workers=min(workers, len(ranges))) as executor:
+        return list(executor.map(_aggregate_range, [path] * len(ranges), *zip(*ranges)))
+
+class SalaryShard(NamedTuple):
+    """
+    Result of one shard file of a bulk aggregation.
+
+    Attributes:
+    - path (str): The path of the shard file.
+    - total (int): Sum of the salaries of the shard.
+    - average (int): Average salary of the shard.
+    - count (int): Number of rows of the shard, corrupted rows included.
+    - bad_rows (List[int]): Byte offsets of the rows without a salary value.
+    - corrupted (bool): True if a salary value is not an integer, the shard is aggregated up to that row.
+    - error (Optional[str]): The reason the shard could not be read, None otherwise.
+    """
+    path: str
+    total: int
+    average: int
+    count: int
+    bad_rows: List[int]
+    corrupted: bool
+    error: Optional[str]
+
+
+class SalaryShardsReport(NamedTuple):
+    """
+    Merged result of a bulk aggregation.
+
+    Attributes:
+    - total (int): Sum of the salaries of all shards.
+    - average (int): Average salary of all shards.
+    - count (int): Number of rows of all shards.
+    - shards (List[SalaryShard]): Results of the shards in path order.
+    """
+    total: int
+    average: int
+    count: int
+    shards: List[SalaryShard]
+
+
+def _aggregate_shard(data: bytes) -> SalaryChunk:
+    """
+    Aggregates the whole content of a shard file, runs in a worker thread or process.
+    """
+    chunk = [0, 0, []]
+    corrupted = not _aggregate_lines(data, 0, chunk)
+    return SalaryChunk(0, len(data), chunk[0], chunk[1], chunk[2], corrupted)
+
+def iter_salary_shards(source: str, workers: int = SHARD_WORKERS, processes: Optional[int] = None,
+                       max_shards: Optional[int] = None) -> Iterator[SalaryShard]:
+    """
+    Aggregates many salary files concurrently, yielding one result per file in path order.
+    The files are read by a pool of threads and parsed by a pool of processes if given.
+
+    Parameters:
+    - source (str): A directory of shard files or a glob pattern.
+    - workers (int): Number of reading threads.
+    - processes (Optional[int]): Number of parsing processes, the files are parsed in the threads if None.
+    - max_shards (Optional[int]): The largest number of files in memory at once, 2 * workers by default.
+
+    Returns:
+    - Iterator[SalaryShard]: The results of the files.
+    """
+    for result in map_shards(_aggregate_shard, shard_paths(source), workers, processes, max_shards):
+        if result.error is not None:
+            yield SalaryShard(result.path, 0, 0, 0, [], False, result.error)
+            continue
+        chunk = result.value
+        metrics.count("salary.bytes", result.size)
+        metrics.count("salary.rows", chunk.count)
+        metrics.count("salary.rejected", len(chunk.bad_rows))
+        average = chunk.total // chunk.count if chunk.count else 0
+        yield SalaryShard(result.path, chunk.total, average, chunk.count, chunk.bad_rows, chunk.corrupted, None)
+
+@metrics.timed("salary")
+def total_salary_shards(source: str, workers: int = SHARD_WORKERS, processes: Optional[int] = None,
+                        max_shards: Optional[int] = None) -> SalaryShardsReport:
+    """
+    Calculates the total salary and the average salary of many files, with the totals of every file.
+    Each file is handled as by total_salary: rows without a salary value are counted but add nothing
+    to the total, and a salary value that is not an integer stops the aggregation of that file.
+    As in total_salary_mmap, the rows are split on b'\\n' only.
+    The unreadable and corrupted files are reported and skipped or counted up to the corrupted row.
+
+    Parameters:
+    - source (str): A directory of shard files or a glob pattern.
+    - workers (int): Number of reading threads.
+    - processes (Optional[int]): Number of parsing processes, the files are parsed in the threads if None.
+    - max_shards (Optional[int]): The largest number of files in memory at once, 2 * workers by default.
+
+    Returns:
+    - SalaryShardsReport: The merged totals and the results of the files.
+    """
+    total = 0
+    count = 0
+    shards = []
+    for shard in iter_salary_shards(source, workers, processes, max_shards):
+        if shard.error is not None:
+            print(f"File '{shard.path}' can not be read: {shard.error}")
+        elif shard.corrupted:
+            print(f"File '{shard.path}' is corrupted")
+        if shard.bad_rows:
+            print(f"File '{shard.path}' has {len(shard.bad_rows)} corrupted rows at offsets {shard.bad_rows}")
+        total += shard.total
+        count += shard.count
+        shards.append(shard)
+    if not shards:
+        print("No files found")
+    return SalaryShardsReport(total, total // count if count else 0, count, shards)
+
+@metrics.timed("salary")
+def total_salary_parallel(path: str, workers: Optional[int] = None) -> Tuple[int, int]:
+    """
+    Calculates the total salary and the average salary from a file using a pool of worker processes.
+    
+    The rows are handled as in total_salary: rows without a salary value are counted
+    but add nothing to the total, and a salary value that is not an integer stops the aggregation
+    at that row. The corrupted rows are reported per chunk.
+    Unlike total_salary, which reads the file in text mode, rows are split on b'\\n' only:
+    a bare '\\r' does not end a row, so "a,1\\rb,2" is one row with a corrupted salary.
+    
+    Parameters:
+    - path (str): The path to the file containing employee data.
+    - workers (Optional[int]): Number of worker processes, defaults to the number of CPUs.
+    
+    Returns:
+    - Tuple[int, int]: A tuple containing the total sum of salaries and the average salary.
+    """
+    total = 0
+    count = 0
+    try:
+        chunks = aggregate_salary_chunks(path, workers)
+    except FileNotFoundError:
+        print("File not found")
+        return 0, 0
+    for i, chunk in enumerate(chunks):
+        total += chunk.total
+        count += chunk.count
+        metrics.count("salary.bytes", chunk.end - chunk.start)
+        metrics.count("salary.rows", chunk.count)
+        metrics.count("salary.rejected", len(chunk.bad_rows))
+        if chunk.bad_rows:
+            print(f"Chunk {i} [{chunk.start}:{chunk.end}] has {len(chunk.bad_rows)} corrupted rows "
+                  f"at offsets {chunk.bad_rows}")
+        if chunk.corrupted:
+            print("File is corrupted")
+            break
+    return total, total // count if count else 0
+
+@metrics.timed("salary")
+def total_salary_mmap(path: str) -> Tuple[int, int]:
+    """
+    Calculates the total salary and the average salary from a file without decoding it.
+    
+    The file is memory-mapped and scanned for comma and newline offsets, only the salary
+    field of each row is sliced out of the buffer and parsed as an integer. Rows are handled
+    as in total_salary, including the corrupted ones.
+    Unlike total_salary, which reads the file in text mode, rows are split on b'\\n' only:
+    a bare '\\r' does not end a row, so "a,1\\rb,2" is one row with a corrupted salary.
+    
+    Parameters:
+    - path (str): The path to the file containing employee data.
+    
+    Returns:
+    - Tuple[int, int]: A tuple containing the total sum of salaries and the average salary.
+    """
+    total = 0
+    count = 0
+    rejected = 0
+    try:
+        with open(path, 'rb') as file:
+            size = os.fstat(file.fileno()).st_size
+            metrics.count("salary.bytes", size)
+            # an empty file can not be memory-mapped
+            if size:
+                with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as buffer:
+                    find = buffer.find
+                    size = len(buffer)
+                    start = 0
+                    while start < size:
+                        end = find(b'\n', start)
+                        if end < 0:
+                            end = size
+                        count += 1
+                        comma = find(b',', start, end)
+                        if comma < 0:
+                            print(f"File data '{buffer[start:end + 1].decode('utf-8')}' is corrupted")
+                            rejected += 1
+                        else:
+                            stop = find(b',', comma + 1, end)
+                            total += int(buffer[comma + 1:stop if stop >= 0 else end])
+                        start = end + 1
+    except FileNotFoundError:
+        print("File not found")
+    except ValueError:
+        print("File is corrupted")
+    finally:
+        metrics.count("salary.rows", count)
+        metrics.count("salary.rejected", rejected)
+    return total, total // count if count else 0
+
+class SalaryColumns(NamedTuple):
+    """
+    Parsed salary file as packed columns.
+
+    Attributes:
+    - salaries (Sequence[int]): Salary of every row as int64, 0 for the rows without a salary value.
+    - bad_rows (Sequence[int]): Byte offsets of the rows without a salary value.
+    - corrupted (bool): True if a salary value is not an integer, the rows stop at that row.
+    """
+    salaries: Sequence[int]
+    bad_rows: Sequence[int]
+    corrupted: bool
+
+
+def build_salary_columns(path: str) -> SalaryColumns:
+    """
+    Parses a salary file into columns and saves them to its binary cache file.
+    The rows are handled as in total_salary, except that they are split on b'\\n' only.
+    The file is read in blocks of READ_BLOCK_SIZE bytes, hashed while it is parsed.
+    The blocks after a corrupted row are hashed too, so the digest covers the whole file.
+
+    Parameters:
+    - path (str): The path to the file containing employee data.
+
+    Returns:
+    - SalaryColumns: The columns in memory.
+    """
+    stamp = stamp_header(path)
+    digest = new_digest()
+    salaries = array('q')
+    bad_rows = array('Q')
+    corrupted = False
+    offset = 0
+    tail = b''
+    with open(path, 'rb') as file:
+        while True:
+            block = file.read(READ_BLOCK_SIZE)
+            digest.update(block)
+            data = tail + block
+            cut = data.rfind(b'\n') + 1 if block else len(data)
+            tail = data[cut:]
+            lines = data[:cut].split(b'\n')
+            if lines and not lines[-1]:
+                lines.pop()
+            for line in lines:
+                try:
+                    salaries.append(int(line.split(b',')[1]))
+                except IndexError:
+                    salaries.append(0)
+                    bad_rows.append(offset)
+                except ValueError:
+                    # counted as in total_salary, the rest of the file is ignored
+                    salaries.append(0)
+                    corrupted = True
+                    break
+                offset += len(line) + 1
+            if corrupted or not block:
+                break
+        while block := file.read(READ_BLOCK_SIZE):
+            digest.update(block)
+    if stamp is not None:
+        header = CacheHeader(KIND_SALARY, *stamp[:2], stamp[2], digest.digest(), len(salaries), len(bad_rows),
+                             int(corrupted))
+        write_cache(path, header, [salaries, bad_rows])
+    return SalaryColumns(salaries, bad_rows, corrupted)
+
+def load_salary_columns(path: str, verify: bool = False) -> Optional[SalaryColumns]:
+    """
+    Memory-maps the columns of the binary cache file of a salary file, without parsing the text.
+
+    Parameters:
+    - path (str): The path to the file containing employee data.
+    - verify (bool): True to check the content hash of the file even if its mtime is old enough.
+
+    Returns:
+    - Optional[SalaryColumns]: The columns backed by the cache file, None if the cache is missing or stale.
+    """
+    cached = open_cache(path, KIND_SALARY, verify)
+    if cached is None:
+        return None
+    header, body = cached
+    sections = read_sections(body, 8 * header.rows, 8 * header.extra)
+    if sections is None:
+        return None
+    salaries, bad_rows = sections
+    return SalaryColumns(salaries.cast('q'), bad_rows.cast('Q'), bool(header.flags & 1))
+
+@metrics.timed("salary")
+def total_salary_cached(path: str, verify: bool = False) -> Tuple[int, int]:
+    """
+    Calculates the total salary and the average salary from the binary cache file of a salary file,
+    building the cache if it is missing or stale. The rows are handled as in total_salary_mmap,
+    the corrupted rows are reported by their byte offsets.
+
+    Parameters:
+    - path (str): The path to the file containing employee data.
+    - verify (bool): True to check the content hash of the file even if its mtime is old enough.
+
+    Returns:
+    - Tuple[int, int]: A tuple containing the total sum of salaries and the average salary.
+    """
+    columns = load_salary_columns(path, verify)
+    if columns is None:
+        try:
+            columns = build_salary_columns(path)
+        except FileNotFoundError:
+            print("File not found")
+            return 0, 0
+        except OverflowError:
+            # a salary beyond int64 does not fit the cache
+            return total_salary(path)
+    for offset in columns.bad_rows:
+        print(f"File data at offset {offset} is corrupted")
+    if columns.corrupted:
+        print("File is corrupted")
+    count = len(columns.salaries)
+    total = sum(columns.salaries)
+    metrics.count("salary.rows", count)
+    metrics.count("salary.rejected", len(columns.bad_rows))
+    return total, total // count if count else 0
+
+class SalaryTail:
+    """
+    Incremental total and average salary of an append-only file.
+    
+    Each refresh reads only the bytes appended since the previous one. A partial trailing line
+    is counted provisionally and parsed again once it is complete. If the file is truncated or
+    replaced by another one (rotation), the totals are recalculated from the beginning.
+    """
+
+    def __init__(self, path: str):
+        """
+        Parameters:
+        - path (str): The path to the file containing employee data.
+        """
+        self.path = path
+        self.reset()
+
+    def reset(self):
+        """
+        Forgets the consumed part of the file, the next refresh rescans it from the beginning.
+        """
+        self.offset = 0
+        self.chunk = [0, 0, []]
+        self.pending = b''
+        self.corrupted = False
+        self.identity = None
+
+    @property
+    def bad_rows(self) -> List[int]:
+        """
+        Byte offsets of the complete rows without a salary value.
+        """
+        return self.chunk[2]
+
+    def refresh(self) -> Tuple[int, int]:
+        """
+        Reads the lines appended since the previous refresh.
+        
+        Returns:
+        - Tuple[int, int]: A tuple containing the total sum of salaries and the average salary.
+        """
+        try:
+            with open(self.path, 'rb') as file:
+                stat = os.fstat(file.fileno())
+                if not self._same_file(file, stat):
+                    self.reset()
+                self.identity = (stat.st_dev, stat.st_ino)
+                if not self.corrupted:
+                    self._consume(file)
+        except FileNotFoundError:
+            print("File not found")
+            self.reset()
+        return self.result()
+
+    def result(self) -> Tuple[int, int]:
+        """
+        Returns the totals of the consumed lines, the partial trailing line included.
+        
+        Returns:
+        - Tuple[int, int]: A tuple containing the total sum of salaries and the average salary.
+        """
+        total, count, _ = self.chunk
+        if self.pending and not self.corrupted:
+            chunk = [total, count, []]
+            _aggregate_lines(self.pending, self.offset, chunk)
+            total, count, _ = chunk
+        return total, total // count if count else 0
+
+    def _same_file(self, file, stat: os.stat_result) -> bool:
+        """
+        Checks the open file is the one consumed so far and it was not truncated.
+        """
+        if self.identity is None:
+            return True
+        if self.identity != (stat.st_dev, stat.st_ino) or stat.st_size < self.offset + len(self.pending):
+            return False
+        # the consumed part ends with a newline unless it was overwritten
+        if self.offset:
+            file.seek(self.offset - 1)
+            return file.read(1) == b'\n'
+        return True
+
+    def _consume(self, file):
+        """
+        Aggregates the complete lines after the consumed part and keeps the partial trailing line.
+        """
+        file.seek(self.offset + len(self.pending))
+        while block := file.read(READ_BLOCK_SIZE):
+            block = self.pending + block
+            cut = block.rfind(b'\n') + 1
+            self.pending = block[cut:]
+            if cut:
+                if not _aggregate_lines(block[:cut], self.offset, self.chunk):
+                    self.corrupted = True
+                    print("File is corrupted")
+                    return
+                self.offset += cut
+
 # Test function with test cases
 def test_total_salary():
     # Test case 1: Check for correct total and average salary
@@ -73,5 +643,179 @@ def test_total_salary():
     assert total == 0 and average == 0, "Test case 4 failed"
     print("All test cases passed successfully.")
     
+def test_total_salary_parallel():
+    # Test case 1: Check the parallel mode matches the sequential one on the test files
+    for name in ["salary_file.txt", "salary_file1.txt", "salary_file_invalid.txt", "salary_file_empty.txt"]:
+        path = pathlib.PurePath(TEST_DATA_DIR, name)
+        assert total_salary_parallel(path, workers=4) == total_salary(path), f"Test case 1 {name} failed"
+    
+    # Test case 2: Check a file split into several chunks
+    global MIN_CHUNK_SIZE
+    min_chunk_size, MIN_CHUNK_SIZE = MIN_CHUNK_SIZE, 64
+    try:
+        with tempfile.TemporaryDirectory() as temp_dir:
+            path = os.path.join(temp_dir, "salary.txt")
+            with open(path, 'w', encoding='utf-8') as file:
+                file.writelines(f"Developer {i},{i * 10}\n" for i in range(1000))
+                file.write("no salary\nlast,7")
+            chunks = aggregate_salary_chunks(path, workers=4)
+            assert len(chunks) == 4, "Test case 2 chunks count failed"
+            assert all(a.end == b.start for a, b in zip(chunks, chunks[1:])), "Test case 2 chunks bounds failed"
+            assert sum(len(chunk.bad_rows) for chunk in chunks) == 1, "Test case 2 bad rows failed"
+            assert total_salary_parallel(path, workers=4) == total_salary(path), "Test case 2 failed"
+    finally:
+        MIN_CHUNK_SIZE = min_chunk_size
+    print("All test cases passed successfully.")
+
+def test_total_salary_mmap():
+    # Test case 1: Check the memory-mapped parser matches the text one on the test files
+    for name in ["salary_file.txt", "salary_file1.txt", "salary_file_invalid.txt", "salary_file_empty.txt"]:
+        path = pathlib.PurePath(TEST_DATA_DIR, name)
+        assert total_salary_mmap(path) == total_salary(path), f"Test case 1 {name} failed"
+    
+    # Test case 2: Check blank lines, extra fields and a salary that is not a number
+    with tempfile.TemporaryDirectory() as temp_dir:
+        path = os.path.join(temp_dir, "salary.txt")
+        for data in ["a,1\n\nb,2,x\r\nc, 3 \n", "a,1\nb,x\nc,3\n", "a,1\nb,\n"]:
+            with open(path, 'w', encoding='utf-8', newline='') as file:
+                file.write(data)
+            assert total_salary_mmap(path) == total_salary(path), f"Test case 2 {data!r} failed"
+        
+        # Test case 3: Check a bare carriage return ends a row in text mode only
+        with open(path, 'wb') as file:
+            file.write(b"a,1\rb,2\n")
+        assert total_salary(path) == (3, 1), "Test case 3 text failed"
+        assert total_salary_mmap(path) == (0, 0), "Test case 3 mmap failed"
+        assert total_salary_parallel(path, workers=1) == (0, 0), "Test case 3 parallel failed"
+    print("All test cases passed successfully.")
+
+def test_salary_tail():
+    with tempfile.TemporaryDirectory() as temp_dir:
+        path = os.path.join(temp_dir, "salary.txt")
+        tail = SalaryTail(path)
+        
+        # Test case 1: Check for file not found
+        assert tail.refresh() == (0, 0), "Test file not found case 1 failed"
+        
+        # Test case 2: Check the appended lines and a partial trailing line
+        with open(path, 'w', encoding='utf-8') as file:
+            file.write("Alex Korp,3000\nNikita Borisenko,20")
+        assert tail.refresh() == total_salary(path) == (3020, 1510), "Test partial line case 2 failed"
+        with open(path, 'a', encoding='utf-8') as file:
+            file.write("00\none value\n")
+        assert tail.refresh() == total_salary(path) == (5000, 1666), "Test appended lines case 2 failed"
+        assert tail.offset == os.path.getsize(path) and tail.bad_rows == [37], "Test offset case 2 failed"
+        
+        # Test case 3: Check the truncated file is rescanned
+        with open(path, 'w', encoding='utf-8') as file:
+            file.write("Sitarama Raju,1000\n")
+        assert tail.refresh() == (1000, 1000), "Test truncated file case 3 failed"
+        
+        # Test case 4: Check the rotated file is rescanned
+        os.rename(path, path + ".1")
+        with open(path, 'w', encoding='utf-8') as file:
+            file.write("Alex Korp,3000\nNikita Borisenko,2000\nSitarama Raju,1000\n")
+        assert tail.refresh() == (6000, 2000), "Test rotated file case 4 failed"
+        
+        # Test case 5: Check a corrupted salary stops the aggregation as in total_salary
+        with open(path, 'a', encoding='utf-8') as file:
+            file.write("Bob,x\nAlice,5000\n")
+        assert tail.refresh() == total_salary(path) == (6000, 1500), "Test corrupted file case 5 failed"
+    print("All test cases passed successfully.")
+
+def benchmark_total_salary(size_mb: int = 1024):
+    """
+    Compares the wall time and the peak of allocated memory of total_salary and total_salary_mmap
+    on a generated file of the given size.
+    
+    Parameters:
+    - size_mb (int): The size of the generated file in megabytes.
+    """
+    with tempfile.TemporaryDirectory() as temp_dir:
+        path = os.path.join(temp_dir, "salary.txt")
+        block = "".join(f"Developer {i},{1000 + i}\n" for i in range(10000))
+        with open(path, 'w', encoding='utf-8') as file:
+            for _ in range(max(1, size_mb * (1 << 20) // len(block))):
+                file.write(block)
+        for function in (total_salary, total_salary_mmap):
+            started = time.perf_counter()
+            function(path)
+            elapsed = time.perf_counter() - started
+            tracemalloc.start()
+            function(path)
+            _, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            print(f"{function.__name__:<20} {elapsed:8.2f} s {peak / 1024:10.1f} KiB peak")
+
+def test_total_salary_shards():
+    # Test case 1: Check the merged totals and the totals of every shard match total_salary
+    with tempfile.TemporaryDirectory() as temp_dir:
+        data = ["Alex Korp,3000\nNikita Borisenko,2000\n", "Sitarama Raju,1000\nBroken row\n", "", "a,1\nb,x\nc,3\n"]
+        for i, content in enumerate(data):
+            with open(os.path.join(temp_dir, f"department{i}.txt"), 'w', encoding='utf-8') as file:
+                file.write(content)
+        paths = sorted(os.path.join(temp_dir, name) for name in os.listdir(temp_dir))
+        # the binary cache sidecars are not shards
+        total_salary_cached(paths[0])
+        for processes in (None, 2):
+            report = total_salary_shards(temp_dir, workers=2, processes=processes, max_shards=2)
+            assert [shard.path for shard in report.shards] == paths, "Test case 1 order failed"
+            assert [(shard.total, shard.average) for shard in report.shards] == [total_salary(path) for path in paths]
+            assert [shard.bad_rows for shard in report.shards] == [[], [19], [], []], "Test case 1 bad rows failed"
+            assert [shard.corrupted for shard in report.shards] == [False, False, False, True]
+            assert (report.total, report.count) == (6001, 6), "Test case 1 totals failed"
+        # Test case 2: Check a glob pattern and a missing directory
+        assert total_salary_shards(os.path.join(temp_dir, "department[01].txt")).total == 6000, "Test case 2 failed"
+        assert total_salary_shards(os.path.join(temp_dir, "missing", "*.txt")) == (0, 0, 0, [])
+    print("All test cases passed successfully.")
+
+def test_total_salary_cached():
+    # Test case 1: Check the cached totals match total_salary, from a cold and a warm cache
+    with tempfile.TemporaryDirectory() as temp_dir:
+        path = os.path.join(temp_dir, "salary.txt")
+        cache = pathlib.Path(path + ".bin")
+        for data in ["Alex Korp,3000\nNikita Borisenko,2000\nSitarama Raju,1000\n", "a,1\n\nb,2,x\r\nc, 3 \n",
+                     "a,1\nb,x\nc,3\n", "a,1\nb,\n", "", "a,5"]:
+            with open(path, 'w', encoding='utf-8', newline='') as file:
+                file.write(data)
+            past = time.time_ns() - 10 ** 10
+            os.utime(path, ns=(past, past))
+            assert total_salary_cached(path) == total_salary(path), f"Test case 1 cold {data!r} failed"
+            assert cache.exists(), f"Test case 1 cache {data!r} failed"
+            assert total_salary_cached(path) == total_salary(path), f"Test case 1 warm {data!r} failed"
+        columns = load_salary_columns(path)
+        assert list(columns.salaries) == [5] and isinstance(columns.salaries, memoryview)
+        
+        # Test case 2: Check a changed file rebuilds the cache
+        with open(path, 'a', encoding='utf-8') as file:
+            file.write("\nb,7\n")
+        assert load_salary_columns(path) is None, "Test case 2 stale failed"
+        assert total_salary_cached(path) == (12, 6), "Test case 2 rebuild failed"
+        assert list(load_salary_columns(path).salaries) == [5, 7]
+        
+        # Test case 3: Check the rows that do not fit the cache and a missing file
+        with open(path, 'w', encoding='utf-8') as file:
+            file.write(f"a,{2 ** 70}\n")
+        assert total_salary_cached(path) == (2 ** 70, 2 ** 70)
+        assert total_salary_cached(os.path.join(temp_dir, "missing.txt")) == (0, 0)
+        
+        # Test case 4: Check the hash of a file corrupted in the first block covers the whole file
+        global READ_BLOCK_SIZE
+        read_block_size, READ_BLOCK_SIZE = READ_BLOCK_SIZE, 8
+        try:
+            with open(path, 'w', encoding='utf-8') as file:
+                file.write("a,1\nb,x\n" + "c,3\n" * 10)
+            assert total_salary_cached(path) == total_salary(path), "Test case 4 cold failed"
+            assert load_salary_columns(path, verify=True) is not None, "Test case 4 digest failed"
+        finally:
+            READ_BLOCK_SIZE = read_block_size
+    print("All test cases passed successfully.")
+
 # Uncomment the line below to run the test function
 # test_total_salary()
+# test_total_salary_parallel()
+# test_total_salary_mmap()
+# test_salary_tail()
+# test_total_salary_shards()
+# test_total_salary_cached()
+# benchmark_total_salary()
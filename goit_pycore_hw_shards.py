@@ -0,0 +1,140 @@
+"""
+Шарди
+
+Спільний конвеєр для обробки великої кількості файлів-шардів (наприклад, по одному файлу на відділ):
+файли читаються обмеженим пулом потоків, а розбір виконується у тих самих потоках або, якщо він
+навантажує процесор, у пулі процесів. Результати повертаються у порядку файлів, і одночасно
+в пам'яті перебуває не більше max_shards шардів.
+
+Використовується функціями total_salary_shards та get_cats_info_shards.
+"""
+from collections import deque
+from concurrent.futures import Executor, Future, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, Callable, Deque, Iterator, List, NamedTuple, Optional
+import glob
+import os
+import tempfile
+import threading
+import time
+
+# Threads reading the shards
+SHARD_WORKERS = 8
+# Sidecar files written next to the shards: the binary caches, the cat indexes and their temporary files
+SIDECAR_SUFFIXES = (".bin", ".idx", ".tmp")
+
+
+class ShardResult(NamedTuple):
+    """
+    The outcome of one shard.
+
+    Attributes:
+    - path (str): The path of the shard file.
+    - size (int): Number of bytes read.
+    - value (Any): The result of the parse function, None if the shard could not be read.
+    - error (Optional[str]): The reason the shard could not be read, None otherwise.
+    """
+    path: str
+    size: int
+    value: Any
+    error: Optional[str]
+
+
+def shard_paths(source: str) -> List[str]:
+    """
+    Returns the sorted shard files of a directory, or of a glob pattern ("**" matches subdirectories).
+    The sidecar files of a directory, ending with one of SIDECAR_SUFFIXES, are not shards.
+
+    Parameters:
+    - source (str): A directory or a glob pattern.
+
+    Returns:
+    - List[str]: The paths of the regular files.
+    """
+    if os.path.isdir(source):
+        return sorted(path for path in glob.glob(os.path.join(source, "*"))
+                      if os.path.isfile(path) and not path.endswith(SIDECAR_SUFFIXES))
+    return sorted(path for path in glob.glob(source, recursive=True) if os.path.isfile(path))
+
+def _process_shard(path: str, parse: Callable[[bytes], Any], processes: Optional[Executor]) -> ShardResult:
+    # runs in a reading thread, the parsing is shipped to the process pool if there is one
+    try:
+        with open(path, 'rb') as file:
+            data = file.read()
+    except OSError as error:
+        return ShardResult(path, 0, None, error.strerror or str(error))
+    value = processes.submit(parse, data).result() if processes is not None else parse(data)
+    return ShardResult(path, len(data), value, None)
+
+def map_shards(parse: Callable[[bytes], Any], paths: List[str], workers: int = SHARD_WORKERS,
+               processes: Optional[int] = None, max_shards: Optional[int] = None) -> Iterator[ShardResult]:
+    """
+    Reads the shards with a pool of threads and parses their bytes, yielding the results in the order of the paths.
+    At most max_shards shards are read, parsed or waiting to be yielded at any time.
+
+    Parameters:
+    - parse (Callable[[bytes], Any]): The function parsing the content of a shard, a module-level
+      function if processes are used.
+    - paths (List[str]): The shard files.
+    - workers (int): Number of reading threads.
+    - processes (Optional[int]): Number of parsing processes, the shards are parsed in the reading threads if None.
+    - max_shards (Optional[int]): The largest number of shards in memory, 2 * workers by default.
+
+    Returns:
+    - Iterator[ShardResult]: The results of the shards.
+    """
+    max_shards = max(1, max_shards or 2 * workers)
+    process_pool = ProcessPoolExecutor(max_workers=processes) if processes else None
+    try:
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            pending: Deque[Future] = deque()
+            remaining = iter(paths)
+            for path in remaining:
+                pending.append(pool.submit(_process_shard, path, parse, process_pool))
+                if len(pending) >= max_shards:
+                    break
+            while pending:
+                # the yielded shard counts until the consumer asks for the next one
+                yield pending.popleft().result()
+                path = next(remaining, None)
+                if path is not None:
+                    pending.append(pool.submit(_process_shard, path, parse, process_pool))
+    finally:
+        if process_pool is not None:
+            process_pool.shutdown(cancel_futures=True)
+
+
+def test_map_shards():
+    in_flight = 0
+    peak = 0
+    lock = threading.Lock()
+
+    def parse(data: bytes) -> int:
+        nonlocal in_flight, peak
+        with lock:
+            in_flight += 1
+            peak = max(peak, in_flight)
+        time.sleep(0.01)
+        with lock:
+            in_flight -= 1
+        return len(data.splitlines())
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        for i in range(20):
+            with open(os.path.join(temp_dir, f"shard{i:02}.txt"), 'w', encoding='utf-8') as file:
+                file.write("line\n" * i)
+        os.mkdir(os.path.join(temp_dir, "nested"))
+        for sidecar in ("shard00.txt.bin", "shard01.txt.idx", "shard02.txt.bin.tmp"):
+            open(os.path.join(temp_dir, sidecar), 'wb').close()
+        paths = shard_paths(temp_dir)
+        assert [os.path.basename(path) for path in paths] == [f"shard{i:02}.txt" for i in range(20)]
+        assert shard_paths(os.path.join(temp_dir, "**", "shard1*.txt")) == paths[10:]
+        results = list(map_shards(parse, paths + [os.path.join(temp_dir, "missing.txt")], workers=4, max_shards=3))
+        assert [result.value for result in results[:-1]] == list(range(20)), "Results in the order of the paths"
+        assert results[-1].value is None and results[-1].error
+        assert 1 < peak <= 3, "No more than max_shards shards at once"
+        # Parsing in processes gives the same results
+        assert [result.value for result in map_shards(len, paths, processes=2)] == [5 * i for i in range(20)]
+    print("All test cases passed successfully.")
+
+# Uncomment the line below to run the test function
+# test_map_shards()